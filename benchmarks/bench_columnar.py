@@ -0,0 +1,42 @@
+'''
+Benchmark comparing the standings of the object model with the columnar store.
+
+Run from the repository root:
+    python -m benchmarks.bench_columnar
+'''
+
+import datetime
+import time
+from src.championship import Championship
+from src.columnar import ColumnarResults
+from benchmarks.bench_ingest import build_grand_prix
+
+def timed(function) -> float:
+    '''Returns the time in milliseconds to call the function.'''
+    start = time.perf_counter()
+    function()
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    '''Prints the time to aggregate and rank all drivers for growing archives.'''
+    print(f"{'drivers':>8} {'results':>8} {'objects ms':>11} {'views ms':>9} {'ids ms':>7}")
+    for drivers, grands_prix in ((100, 10), (100, 500), (5000, 10), (20000, 5)):
+        championship = Championship("Benchmark", datetime.datetime.now())
+        for i in range(1, grands_prix + 1):
+            championship.add_result(build_grand_prix(i, drivers))
+        store = ColumnarResults.from_championship(championship)
+
+        objects = timed(lambda c=championship: (
+            c.get_driver_result(),
+            c.get_driver_result(lambda d: (-d.total_laps, d.total_time)),
+            c.get_driver_result(lambda d: d.fastest_lap)))
+        views = timed(lambda s=store: (
+            s.driver_standings("best"), s.driver_standings("total"),
+            s.driver_standings("fastest")))
+        store.append(championship.grand_prix[0].results[0])
+        ids = timed(lambda s=store: (
+            s.ranking("best"), s.ranking("total"), s.ranking("fastest")))
+        print(f"{drivers:>8} {len(store):>8} {objects:>11.2f} {views:>9.2f} {ids:>7.2f}")
+
+if __name__ == "__main__":
+    main()
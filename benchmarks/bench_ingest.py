@@ -0,0 +1,45 @@
+'''
+Benchmark for ingesting results into a Championship.
+The time per result should stay constant when the number of drivers grows.
+
+Run from the repository root:
+    python -m benchmarks.bench_ingest
+'''
+
+import datetime
+import time
+from src.championship import Championship, GrandPrix
+from src.race import RaceResult
+
+def build_grand_prix(grand_prix_id: int, drivers: int) -> GrandPrix:
+    '''Creates a grand prix with one result per driver.'''
+    grand_prix = GrandPrix(grand_prix_id, f"Grand Prix {grand_prix_id}",
+                           datetime.datetime.now(), "")
+    for i in range(drivers):
+        grand_prix.add_race_result(RaceResult({
+            'driver': f"Driver {i}", 'car': "Car", 'laps': 30, 'time': 300000 + i,
+            'position': i + 1, 'best_lap_time': 6000 + i, 'id': grand_prix.id}))
+    return grand_prix
+
+def bench_ingest(drivers: int, grands_prix: int) -> float:
+    '''Returns the time in seconds to ingest the given number of results.'''
+    prepared = [build_grand_prix(i, drivers) for i in range(1, grands_prix + 1)]
+    championship = Championship("Benchmark", datetime.datetime.now())
+
+    start = time.perf_counter()
+    for grand_prix in prepared:
+        championship.add_result(grand_prix)
+    return time.perf_counter() - start
+
+def main():
+    '''Prints the ingest time for growing fields.'''
+    grands_prix = 20
+    print(f"{'drivers':>8} {'results':>8} {'total ms':>10} {'us/result':>10}")
+    for drivers in (10, 100, 1000, 5000):
+        elapsed = bench_ingest(drivers, grands_prix)
+        results = drivers * grands_prix
+        print(f"{drivers:>8} {results:>8} {elapsed * 1000:>10.2f} "
+              f"{elapsed / results * 1e6:>10.3f}")
+
+if __name__ == "__main__":
+    main()
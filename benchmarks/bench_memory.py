@@ -0,0 +1,43 @@
+'''
+Benchmark for the memory used by race results.
+Measures the bytes per result for an archive of 100k results with tracemalloc.
+
+Run from the repository root:
+    python -m benchmarks.bench_memory
+'''
+
+import tracemalloc
+from src.race import RaceResult
+
+RESULTS = 100_000
+
+def rows():
+    '''Returns the values of the results, ordered like RaceResult.FIELDS.'''
+    drivers = [f"Driver {i}" for i in range(100)]
+    cars = [f"Car {i}" for i in range(10)]
+    return [(i % 100 + 1, drivers[i % 100], 30, 300000 + i, cars[i % 10], 6000 + i % 500,
+             i // 100 + 1) for i in range(RESULTS)]
+
+def measure(build) -> float:
+    '''Returns the bytes per result allocated by the build function.'''
+    values = rows()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    results = build(values)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(results) == RESULTS
+    return (after - before) / RESULTS
+
+def main():
+    '''Prints the bytes per result for the different representations.'''
+    field_names = ("position", "driver", "laps", "time", "car", "best_lap_time", "id")
+    print(f"{'representation':<28} {'bytes/result':>12}")
+    print(f"{'dict per line':<28} "
+          f"{measure(lambda v: [dict(zip(field_names, row)) for row in v]):>12.1f}")
+    print(f"{'RaceResult(dict)':<28} "
+          f"{measure(lambda v: [RaceResult(dict(zip(field_names, row))) for row in v]):>12.1f}")
+    print(f"{'RaceResult.from_rows':<28} {measure(RaceResult.from_rows):>12.1f}")
+
+if __name__ == "__main__":
+    main()
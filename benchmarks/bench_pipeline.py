@@ -0,0 +1,183 @@
+'''
+End-to-end benchmark of the results pipeline.
+Times parsing, aggregating, ranking, rendering and writing separately on generated
+cockpitXP files and compares the timings with the stored baseline. The baseline holds
+every stage relative to a fixed reference workload that is timed alternately with it,
+so it can be compared on other machines and under another load.
+
+Run from the repository root:
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --update-baseline
+'''
+
+import gc
+import os
+import sys
+import json
+import time
+import statistics
+import argparse
+import datetime
+import tempfile
+from typing import Callable
+from typing import Dict
+from typing import Tuple
+from src.championship import Championship
+from src.decode_methods import iter_grand_prix_cockpitxp, parse_results_cockpitxp
+from src.output import PageWriter
+from src.renderer import PAGES, render_page
+from benchmarks.generate_cockpitxp import write_cockpitxp_file
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+REGRESSION_FACTOR = 1.25
+# Stages that are slower by less than this many milliseconds are within the timer noise
+MIN_REGRESSION_MS = 1.0
+
+# Scale name -> (drivers, grands prix, seasons)
+SCALES = {
+    "small": (12, 8, 1),
+    "medium": (60, 20, 1),
+    "large": (300, 20, 5),
+}
+
+def best_of(function:Callable, repeat:int, setup:Callable = None,
+            clock:Callable[[], float] = time.perf_counter) -> float:
+    '''
+    Returns the fastest of several runs in milliseconds.
+    The result of `setup` is passed to the function and is not timed. The garbage
+    collector is paused during a run, as in `timeit`.
+    '''
+    timings = []
+    for _ in range(repeat):
+        arguments = (setup(),) if setup else ()
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            start = clock()
+            function(*arguments)
+            timings.append((clock() - start) * 1000)
+        finally:
+            if collecting:
+                gc.enable()
+    return min(timings)
+
+def reference_workload() -> None:
+    '''A fixed pure Python workload independent of the code under test.'''
+    values = [(i * 7919) % 10007 for i in range(30000)]
+    names = {str(value): value for value in values}
+    " ".join(sorted(names))
+
+def relative_best_of(function:Callable, repeat:int,
+                     setup:Callable = None) -> Tuple[float, float]:
+    '''
+    Returns the fastest run of a function in milliseconds and its median time relative
+    to `reference_workload`. Every run is paired with a run of the reference workload
+    right before it, so both see the same load. The runs are timed in CPU time of the
+    process, so other processes add as little noise as possible.
+    '''
+    timings = []
+    relative = []
+    for _ in range(repeat):
+        reference = best_of(reference_workload, 1, clock=time.process_time)
+        timings.append(best_of(function, 1, setup, clock=time.process_time))
+        relative.append(timings[-1] / reference)
+    return min(timings), statistics.median(relative)
+
+def ingest(grands_prix) -> Championship:
+    '''Builds a championship from parsed grands prix.'''
+    championship = Championship("Benchmark", datetime.datetime.now())
+    for grand_prix in grands_prix:
+        championship.add_result(grand_prix)
+    return championship
+
+def rank(championship:Championship) -> None:
+    '''Computes all rankings used by the pages.'''
+    championship.get_driver_result()
+    championship.driver_standings("total")
+    championship.driver_standings("fastest")
+    championship.get_driver_result_last_grand_prix()
+
+def bench_scale(drivers:int, grands_prix:int, seasons:int,
+                repeat:int) -> Dict[str, Tuple[float, float]]:
+    '''
+    Returns the time of every stage in milliseconds and relative to the reference
+    workload for one scale.
+    '''
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.txt")
+        write_cockpitxp_file(path, drivers, grands_prix, seasons)
+        parsed = list(iter_grand_prix_cockpitxp(path))
+        championship = ingest(parsed)
+        pages = {page: render_page(page, championship)[1] for page in PAGES}
+
+        def write():
+            writer = PageWriter()
+            for page, html in pages.items():
+                writer.write(os.path.join(directory, f"{page}.html"), html)
+
+        return {
+            "parse": relative_best_of(lambda: parse_results_cockpitxp(path), repeat),
+            "aggregate": relative_best_of(ingest, repeat,
+                                          setup=lambda: list(iter_grand_prix_cockpitxp(path))),
+            "rank": relative_best_of(lambda: rank(championship), repeat),
+            "render": relative_best_of(
+                lambda: [render_page(page, championship) for page in PAGES], repeat),
+            "write": relative_best_of(write, repeat),
+        }
+
+def compare(results:Dict[str, Dict[str, Tuple[float, float]]],
+            baseline:Dict[str, Dict[str, float]]) -> bool:
+    '''
+    Prints the timings next to the baseline and returns False on a regression.
+    A stage regressed if its time relative to the reference workload grew by more than
+    `REGRESSION_FACTOR` and by more than `MIN_REGRESSION_MS` milliseconds.
+    '''
+    ok = True
+    print(f"{'scale':<8} {'stage':<10} {'ms':>10} {'relative':>10} {'baseline':>10} "
+          f"{'ratio':>7}")
+    for scale, stages in results.items():
+        for stage, (value, relative) in stages.items():
+            expected = baseline.get(scale, {}).get(stage)
+            if expected:
+                ratio = relative / expected
+                slower = value - value / ratio
+                flag = ("  REGRESSION" if ratio > REGRESSION_FACTOR
+                        and slower > MIN_REGRESSION_MS else "")
+                ok = ok and not flag
+                print(f"{scale:<8} {stage:<10} {value:>10.2f} {relative:>10.4f} "
+                      f"{expected:>10.4f} {ratio:>6.2f}x{flag}")
+            else:
+                print(f"{scale:<8} {stage:<10} {value:>10.2f} {relative:>10.4f} {'-':>10} "
+                      f"{'-':>7}")
+    return ok
+
+def main():
+    '''Runs the benchmark and compares it with or stores it as the baseline.'''
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--scale", choices=list(SCALES), action="append")
+    arguments.add_argument("--repeat", type=int, default=9)
+    arguments.add_argument("--update-baseline", action="store_true")
+    args = arguments.parse_args()
+
+    results = {scale: bench_scale(*SCALES[scale], args.repeat)
+               for scale in args.scale or SCALES}
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+    ok = compare(results, baseline)
+
+    if args.update_baseline:
+        baseline.update({scale: {stage: float(f"{relative:.4g}")
+                                 for stage, (_, relative) in stages.items()}
+                         for scale, stages in results.items()})
+        with open(BASELINE_PATH, "w", encoding="utf-8") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+    elif not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+'''
+Benchmark of the cold start of the monitor.
+Compares parsing the whole results file with restoring the snapshot of a previous run
+and decoding only the grand prix appended since. Both start with empty name tables,
+as a new process does. The save time is the time to append that grand prix to the snapshot.
+
+Run from the repository root:
+    python -m benchmarks.bench_restart
+'''
+
+import os
+import shutil
+import argparse
+import tempfile
+from src.decode_methods import CockpitXPNames, CockpitXPTailParser
+from benchmarks.bench_pipeline import SCALES, best_of
+from benchmarks.generate_cockpitxp import generate_lines
+
+def cold_names() -> None:
+    '''Empties the name tables shared by all parsers, they are kept for the whole process.'''
+    CockpitXPNames.set_shared(CockpitXPNames())
+
+def full_parse(path:str) -> None:
+    '''Starts without a snapshot and parses the whole file.'''
+    CockpitXPTailParser(path).update()
+
+def restore(path:str, snapshot_path:str) -> None:
+    '''Starts from the snapshot and parses the appended lines.'''
+    parser = CockpitXPTailParser(path, snapshot_path=snapshot_path)
+    if not parser.load_snapshot():
+        raise RuntimeError("The snapshot was not used")
+    parser.update()
+
+def restored_parser(path:str, snapshot_path:str, saved_path:str) -> CockpitXPTailParser:
+    '''Restores the saved snapshot and parses the appended grand prix, ready to be saved.'''
+    shutil.copyfile(saved_path, snapshot_path)
+    parser = CockpitXPTailParser(path, snapshot_path=snapshot_path)
+    parser.load_snapshot()
+    parser.update()
+    return parser
+
+def bench_scale(drivers:int, grands_prix:int, seasons:int, repeat:int) -> dict:
+    '''Returns the cold start times in milliseconds and the snapshot size for one scale.'''
+    lines = generate_lines(drivers, grands_prix, seasons)
+    last_grand_prix = max(i for i, line in enumerate(lines) if line.startswith("----"))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "results.txt")
+        snapshot_path = os.path.join(directory, "snapshot.json")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines[:last_grand_prix]) + "\n")
+        parser = CockpitXPTailParser(path, snapshot_path=snapshot_path)
+        parser.update()
+        parser.save_snapshot()
+        saved_path = os.path.join(directory, "saved.json")
+        shutil.copyfile(snapshot_path, saved_path)
+        with open(path, "a", encoding="utf-8") as file:
+            file.write("\n".join(lines[last_grand_prix:]) + "\n")
+
+        return {
+            "full_parse": best_of(lambda _: full_parse(path), repeat, setup=cold_names),
+            "restore": best_of(lambda _: restore(path, snapshot_path), repeat,
+                               setup=cold_names),
+            "save": best_of(lambda restored: restored.save_snapshot(), repeat,
+                            setup=lambda: restored_parser(path, snapshot_path, saved_path)),
+            "file_kb": os.path.getsize(path) / 1024,
+            "snapshot_kb": os.path.getsize(snapshot_path) / 1024,
+        }
+
+def main():
+    '''Prints the cold start times of all scales.'''
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--scale", choices=list(SCALES), action="append")
+    arguments.add_argument("--repeat", type=int, default=5)
+    args = arguments.parse_args()
+
+    print(f"{'scale':<8} {'full parse ms':>14} {'restore ms':>11} {'speedup':>8} "
+          f"{'save ms':>8} {'file kB':>8} {'snapshot kB':>12}")
+    for scale in args.scale or SCALES:
+        result = bench_scale(*SCALES[scale], args.repeat)
+        print(f"{scale:<8} {result['full_parse']:>14.2f} {result['restore']:>11.2f} "
+              f"{result['full_parse'] / result['restore']:>7.1f}x {result['save']:>8.2f} "
+              f"{result['file_kb']:>8.0f} {result['snapshot_kb']:>12.0f}")
+
+if __name__ == "__main__":
+    main()
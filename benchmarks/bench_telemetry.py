@@ -0,0 +1,94 @@
+'''
+Benchmark of the live lap timing.
+Generates a replay file of a heat and measures how many crossing events per second
+are processed, and how much memory is allocated while the heat is running.
+
+Run from the repository root:
+    python -m benchmarks.bench_telemetry
+    python -m benchmarks.bench_telemetry --lanes 8 --laps 2000 --write heat.txt
+'''
+
+import os
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from src.telemetry import HeatTelemetry, replay_lines
+from benchmarks.generate_cockpitxp import CARS, driver_names
+
+def generate_events(lanes:int, laps:int, seed:int = 1) -> list:
+    '''Returns the lines of a heat with the given number of lanes and laps per lane.'''
+    rng = random.Random(seed)
+    skill = [rng.uniform(5500, 7500) for _ in range(lanes)]
+    crossings = []
+    for lane in range(lanes):
+        timestamp = 0
+        for _ in range(laps):
+            timestamp += int(rng.gauss(skill[lane], 250))
+            crossings.append((timestamp, lane + 1))
+    crossings.sort()
+    return (["start 0"] + [f"{lane} {timestamp}" for timestamp, lane in crossings]
+            + ["end"])
+
+def lane_setup(lanes:int) -> list:
+    '''Returns driver and car of every lane.'''
+    rng = random.Random(1)
+    return [(name, rng.choice(CARS)) for name in driver_names(lanes, rng)]
+
+def measure_crossings(lanes:int, events:list) -> tuple:
+    '''Returns the crossings per second and the bytes retained while processing them.'''
+    heat = HeatTelemetry(lane_setup(lanes))
+    heat.start(0)
+    start = time.perf_counter()
+    for lane, timestamp in events:
+        heat.crossing(lane, timestamp)
+    rate = len(events) / (time.perf_counter() - start)
+
+    heat.start(0)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for lane, timestamp in events:
+        heat.crossing(lane, timestamp)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return rate, retained
+
+def measure_replay(lanes:int, lines:list) -> tuple:
+    '''Returns the events per second read from a replay file and the finished heat.'''
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "heat.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+        heat = HeatTelemetry(lane_setup(lanes))
+        start = time.perf_counter()
+        for line in replay_lines(path):
+            heat.feed_line(line)
+        return (len(lines) - 2) / (time.perf_counter() - start), heat
+
+def main():
+    '''Replays a generated heat and prints the throughput.'''
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("--lanes", type=int, default=6)
+    arguments.add_argument("--laps", type=int, default=5000)
+    arguments.add_argument("--write", metavar="PATH", help="also write the replay file")
+    args = arguments.parse_args()
+
+    lines = generate_events(args.lanes, args.laps)
+    if args.write:
+        with open(args.write, "w", encoding="utf-8") as file:
+            file.write("\n".join(lines) + "\n")
+    events = [tuple(map(int, line.split())) for line in lines[1:-1]]
+    crossing_rate, retained = measure_crossings(args.lanes, events)
+    replay_rate, heat = measure_replay(args.lanes, lines)
+
+    print(f"{len(events)} crossings on {args.lanes} lanes")
+    print(f"crossing():   {crossing_rate:>12,.0f} events/s")
+    print(f"replay file:  {replay_rate:>12,.0f} events/s")
+    print(f"memory retained while running: {retained} bytes")
+    for lane in heat.standings():
+        print(f"  P{lane.position} lane {lane.lane} {lane.driver:<20} {lane.laps:>5} laps "
+              f"best {lane.best_lap} ms gap {lane.gap} ms")
+
+if __name__ == "__main__":
+    main()
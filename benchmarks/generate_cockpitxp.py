@@ -0,0 +1,97 @@
+'''
+Deterministic generator for results files in the cockpitXP format.
+The same arguments always produce the same file, so benchmark runs are comparable.
+Driver names contain umlauts and characters outside of cp273 to exercise the decoder.
+
+Run from the repository root:
+    python -m benchmarks.generate_cockpitxp results.txt --drivers 40 --grands-prix 12
+'''
+
+import argparse
+import random
+from typing import List
+
+FIRST_NAMES = ["Jürgen", "Mösch", "Käthe", "Björn", "Günther", "Anna", "Peter", "Zoë",
+               "Łukasz", "Sören", "Heinz", "Marie", "Tom", "Ulrike", "Özgür", "Lena"]
+LAST_NAMES = ["Müller", "Groß", "Weiß", "Schäfer", "Kühn", "Bauer", "Schmidt", "Köhler",
+              "Dvořák", "Fuchs", "Hoffmann", "Wagner", "Krüger", "Lang", "Böhm", "Meyer"]
+CARS = ["Ferrari 312 T", "McLaren M23", "Lotus 72", "Brabham BT44", "Tyrrell P34",
+        "Porsche 917 K", "Ford GT40", "Mercedes W196", "Audi R8", "BMW M1 Procar"]
+
+def driver_names(count:int, rng:random.Random) -> List[str]:
+    '''Returns distinct driver names, numbered once the combinations are exhausted.'''
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    rng.shuffle(names)
+    return [names[i % len(names)] + (f" {i // len(names)}" if i >= len(names) else "")
+            for i in range(count)]
+
+def format_line(name:str, car:str, result:tuple, position:int) -> str:
+    '''Formats a result (laps, time, best lap) as a line with the fixed cockpitXP columns.'''
+    laps, time, best_lap = result
+    return f"{name[:25]:<25}{car[:55]:<55}{laps:>6}{time:>10}{position:>3}{best_lap:>8}"
+
+def simulate_heat(rng:random.Random, skill:float, heat_time:int) -> tuple:
+    '''Returns laps, time and best lap of a driver in a heat of the given length.'''
+    lap_times = [rng.gauss(skill, 250) for _ in range(60)]
+    total, laps = 0.0, 0
+    for lap_time in lap_times:
+        if total + lap_time > heat_time:
+            break
+        total += lap_time
+        laps += 1
+    return laps, int(total), int(min(lap_times[:max(laps, 1)]))
+
+def generate_lines(drivers:int, grands_prix:int, seasons:int = 1, seed:int = 1) -> List[str]:
+    '''
+    Generates the lines of a results file.
+
+    Parameters
+    ------------
+    drivers: int
+        Number of drivers in the field.
+    grands_prix: int
+        Number of grands prix per season.
+    seasons: int, default 1
+        Number of seasons written one after another.
+    seed: int, default 1
+        Seed of the random generator.
+
+    Returns
+    ------------
+    list
+        The lines of the file without line breaks.
+    '''
+    rng = random.Random(seed)
+    names = driver_names(drivers, rng)
+    skill = {name: rng.uniform(5500, 7500) for name in names}
+    car = {name: rng.choice(CARS) for name in names}
+
+    lines = []
+    for _ in range(seasons * grands_prix):
+        lines.append("-" * 102)
+        field = [name for name in names if rng.random() < 0.85] or names[:1]
+        results = [(name, simulate_heat(rng, skill[name], 5 * 60 * 1000)) for name in field]
+        results.sort(key=lambda r: (-r[1][0], r[1][1]))
+        for position, (name, result) in enumerate(results, 1):
+            lines.append(format_line(name, car[name], result, position))
+    return lines
+
+def write_cockpitxp_file(path:str, drivers:int, grands_prix:int, seasons:int = 1,
+                         seed:int = 1) -> None:
+    '''Writes a generated results file, see `generate_lines` for the parameters.'''
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(generate_lines(drivers, grands_prix, seasons, seed)) + "\n")
+
+def main():
+    '''Writes a results file with the scale given on the command line.'''
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("path")
+    arguments.add_argument("--drivers", type=int, default=20)
+    arguments.add_argument("--grands-prix", type=int, default=10)
+    arguments.add_argument("--seasons", type=int, default=1)
+    arguments.add_argument("--seed", type=int, default=1)
+    args = arguments.parse_args()
+    write_cockpitxp_file(args.path, args.drivers, args.grands_prix, args.seasons, args.seed)
+
+if __name__ == "__main__":
+    main()
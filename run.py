@@ -3,52 +3,144 @@
 
 import os
 import sys
-import time
+import asyncio
+import logging
+import argparse
 
 from src.renderer import generate_championship_page, generate_sprint_ranking_page
 from src.renderer import generate_fastest_lap_page, generate_grand_prix_page
-from src.decode_methods import parse_results_cockpitxp
+from src.renderer import PageRenderer
+from src.store import ResultsStore
+from src.decode_methods import CockpitXPTailParser
+from src.watcher import create_watcher
+from src.server import LiveResultsServer
+from src.pipeline import RefreshPipeline
+from src.daemon import ChampionshipDaemon, load_config
+from src.telemetry import HeatTelemetry, replay_lines, stream_lines, udp_lines
 
 FILE_PATH = ''
+TEMPLATE_CACHE_DIR = '.template_cache'
+METRICS_PATH = 'output/metrics.prom'
+SNAPSHOT_PATH = '.results_snapshot.json'
 
-def file_has_changed(last_mtime):
-    '''Check if the file modification time has changed.'''
-    try:
-        current_mtime = os.path.getmtime(FILE_PATH)
-        return current_mtime != last_mtime, current_mtime
-    except FileNotFoundError:
-        return False, last_mtime
+def read_new_results(parser: CockpitXPTailParser, finish: bool = False) -> bool:
+    '''Reads the appended results, malformed lines are reported and skipped.'''
+    updated = parser.update(finish)
+    for error in parser.errors:
+        print(f"Skipped malformed line: {error}")
+    return updated
+
+def create_parser() -> CockpitXPTailParser:
+    '''Creates the parser, the parsed state of a previous run is restored if it is still valid.'''
+    parser = CockpitXPTailParser(FILE_PATH, snapshot_path=SNAPSHOT_PATH)
+    if parser.load_snapshot():
+        print(f"Restored {parser.offset} parsed bytes from {SNAPSHOT_PATH}")
+    return parser
 
 def monitor_file():
-    '''Monitor the file for changes and process it.'''
-    inital_run = True
-    if inital_run:
-        print("Initial run...")
-        result = parse_results_cockpitxp(FILE_PATH)
-        generate_championship_page(result)
-        generate_sprint_ranking_page(result)
-        generate_fastest_lap_page(result)
-        generate_grand_prix_page(result)
-        inital_run = False
-
-    last_mtime = os.path.getmtime(FILE_PATH)  # Get initial modification time
-    while True:
-        time.sleep(2)  # Check updates every 2 seconds
-        changed, last_mtime = file_has_changed(last_mtime)
-
-        if changed:
-            print("File updated! Reading new results...")
-            result = parse_results_cockpitxp(FILE_PATH)
-            generate_championship_page(result)
-            generate_sprint_ranking_page(result)
-            generate_fastest_lap_page(result)
-            generate_grand_prix_page(result)
+    '''
+    Monitor the file for changes and process it.
+    Watching, parsing and rendering run on their own threads, a render never delays
+    reading the next change.
+    '''
+    PageRenderer.set_shared(PageRenderer(cache_dir=TEMPLATE_CACHE_DIR))
+    watcher = create_watcher(FILE_PATH)
+    parser = create_parser()
+    print("Initial run...")
+    try:
+        RefreshPipeline(parser, watcher, metrics_path=METRICS_PATH).run()
+    except KeyboardInterrupt:
+        pass
+
+
+def telemetry_lines(source: str):
+    '''Returns the lap crossing events of "-" (stdin), "udp:HOST:PORT" or a replay file.'''
+    if source == "-":
+        return stream_lines(sys.stdin.buffer)
+    if source.startswith("udp:"):
+        host, port = source[4:].rsplit(":", 1)
+        return udp_lines(host, int(port))
+    return replay_lines(source, speed=1.0)
+
+def serve_live_results(host: str, port: int, telemetry: str = None, lanes: list = None):
+    '''
+    Serve the pages from memory and push changes to the browsers.
+    With a telemetry source the running heat is shown on the `heat` page.
+    '''
+    PageRenderer.set_shared(PageRenderer(cache_dir=TEMPLATE_CACHE_DIR))
+    watcher = create_watcher(FILE_PATH)
+    parser = create_parser()
+    read_new_results(parser)
+    server = LiveResultsServer(parser, watcher, metrics_path=METRICS_PATH)
+    heat = HeatTelemetry(lanes) if telemetry else None
+    lines = telemetry_lines(telemetry) if telemetry else None
+    try:
+        asyncio.run(server.serve(host, port, heat, lines))
+    except KeyboardInterrupt:
+        pass
+
+def archive_results(database: str):
+    '''Store the results file as a season and generate the pages of all seasons.'''
+    PageRenderer.set_shared(PageRenderer(cache_dir=TEMPLATE_CACHE_DIR))
+    parser = create_parser()
+    read_new_results(parser, finish=True)
+    store = ResultsStore(database)
+    try:
+        season = os.path.splitext(os.path.basename(FILE_PATH))[0]
+        store.add_championship(parser.championship, season)
+        seasons = store.results(name=parser.championship.name)
+        generate_championship_page(seasons)
+        generate_sprint_ranking_page(seasons)
+        generate_fastest_lap_page(seasons)
+        generate_grand_prix_page(seasons)
+        print(f"Stored season {season}, generated the pages of {len(store.seasons())} seasons")
+    finally:
+        store.close()
+
+def monitor_championships(config_path: str, workers: int):
+    '''Monitor the championships of a configuration file in a process pool.'''
+    configs = load_config(config_path)
+    print(f"Monitoring {len(configs)} championships: {', '.join(c.name for c in configs)}")
+    try:
+        ChampionshipDaemon(configs, workers, TEMPLATE_CACHE_DIR).run()
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
-        FILE_PATH = sys.argv[1]
-    else:
-        raise ValueError("Please provide the file path as an argument.")
+    arguments = argparse.ArgumentParser(description=__doc__)
+    arguments.add_argument("file_path", nargs="?", help="results file in the cockpitXP format")
+    arguments.add_argument("--serve", action="store_true",
+                           help="serve the pages over HTTP and push live updates")
+    arguments.add_argument("--host", default="0.0.0.0", help="address of the live server")
+    arguments.add_argument("--port", type=int, default=8000, help="port of the live server")
+    arguments.add_argument("--telemetry", metavar="SOURCE",
+                           help="show the running heat on the live server, read the lap "
+                                "crossing events from - (stdin), udp:HOST:PORT or a replay file")
+    arguments.add_argument("--lane", metavar="DRIVER:CAR", action="append", default=[],
+                           help="driver and car of the next lane for --telemetry")
+    arguments.add_argument("--archive", metavar="DATABASE",
+                           help="store the file as a season in the SQLite database "
+                                "and generate the pages of all stored seasons")
+    arguments.add_argument("--config", metavar="CONFIG",
+                           help="monitor the championships of a JSON configuration file, "
+                                "each with its own results file and output directory")
+    arguments.add_argument("--workers", type=int,
+                           help="number of worker processes for --config")
+    args = arguments.parse_args()
+    if not args.file_path and not args.config:
+        arguments.error("a results file or --config is required")
+    if args.telemetry and not (args.serve and args.lane):
+        arguments.error("--telemetry requires --serve and at least one --lane")
+    FILE_PATH = args.file_path
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
 
-    monitor_file()
+    if args.config:
+        monitor_championships(args.config, args.workers)
+    elif args.archive:
+        archive_results(args.archive)
+    elif args.serve:
+        serve_live_results(args.host, args.port, args.telemetry,
+                           [lane.partition(":")[::2] for lane in args.lane])
+    else:
+        monitor_file()
@@ -4,9 +4,13 @@ This module contains the GrandPrix class and the Championship class.
 
 import datetime
 from typing import Callable
+from typing import Dict
 from typing import List
+from typing import Tuple
 from src.race import RaceResult
 from src.driver import Driver
+from src.standings import Standings
+from src.indexes import CarStatistics, HeadToHead, ResultIndexes
 
 class GrandPrix:
     '''Grand Prix class assigns results to a grand prix'''
@@ -46,8 +50,16 @@ class GrandPrix:
         self._results.append(race_result)
 
 
-class Championship:
-    '''Championship class assigns grand prix to a championship'''
+class Championship: # pylint: disable=too-many-instance-attributes
+    '''
+    Championship class assigns grand prix to a championship.
+    The driver rankings and the ranking of the last grand prix are kept in order
+    while results are added, so reading them needs no sort.
+    Every derived view has a version that is increased when an added result changes it,
+    pages only have to be rendered again if a view they show has a new version.
+    '''
+
+    VIEWS = Standings.VIEWS
 
     def __init__(self, name:str, date:datetime.datetime):
         '''Initializes a Championship with name and date.'''
@@ -55,6 +67,10 @@ class Championship:
         self.date = date
         self.drivers : List[Driver] = []
         self.grand_prix : List[GrandPrix] = []
+        self._drivers_by_name : Dict[str, Driver] = {}
+        self._grand_prix_by_id : Dict[int, GrandPrix] = {}
+        self._standings = Standings()
+        self._indexes = ResultIndexes()
 
     def add_result(self, grandprix: GrandPrix) -> None:
         """
@@ -66,8 +82,49 @@ class Championship:
             The GrandPrix to be added.
         """
         self.grand_prix.append(grandprix)
+        self._grand_prix_by_id[grandprix.id] = grandprix
+        self._standings.new_grand_prix()
+        self._standings.size = (len(self.drivers), len(self.grand_prix))
+        self._indexes.size = self._standings.size
         for _race_result in grandprix.results:
-            self.get_driver_by_name(_race_result.driver).add_race(_race_result)
+            self._add_to_driver(_race_result, True)
+
+    def add_race_result(self, grandprix: GrandPrix, race_result: RaceResult) -> None:
+        """
+        Adds a single race result to a grand prix that is already part of the championship.
+
+        Parameters
+        ------------
+        grandprix: 'GrandPrix'
+            The GrandPrix the result belongs to.
+        race_result: 'RaceResult'
+            The RaceResult to be added.
+        """
+        grandprix.add_race_result(race_result)
+        self._add_to_driver(race_result, bool(self.grand_prix) and grandprix is self.grand_prix[-1])
+
+    def _add_to_driver(self, race_result: RaceResult, last_grand_prix: bool) -> None:
+        '''Adds a result to its driver and moves the driver within the rankings.'''
+        driver = self.get_driver_by_name(race_result.driver)
+        changed = driver.add_race(race_result)
+        self._standings.add(driver, race_result, last_grand_prix, changed)
+        self._indexes.add(race_result)
+
+    def view_versions(self) -> Dict[str, int]:
+        '''
+        Returns the version of every view in `VIEWS`.
+        If a result was changed after it was added, or drivers or grands prix were added
+        without `add_result`, all views get a new version.
+
+        Returns
+        ------------
+        dict
+            View name -> version.
+        '''
+        standings = self._standings
+        if not standings.valid or standings.size != (len(self.drivers), len(self.grand_prix)):
+            standings.changed(*self.VIEWS)
+        return dict(standings.versions)
 
     def get_driver_by_name(self, name: str, create: bool = True) -> Driver:
         '''
@@ -88,37 +145,141 @@ class Championship:
         '''
         if not isinstance(name, str):
             raise ValueError("Driver name must be a string")
-        for driver in self.drivers:
-            if driver.name == name:
-                return driver
+        if len(self._drivers_by_name) != len(self.drivers):
+            self._drivers_by_name = {d.name: d for d in self.drivers}
+            self._standings.valid = False
+            for known_driver in self.drivers:
+                known_driver.add_listener(self._standings)
+                known_driver.add_listener(self._indexes)
+        driver = self._drivers_by_name.get(name)
+        if driver is not None:
+            return driver
         if create:
             new_driver = Driver(name)
+            new_driver.add_listener(self._standings)
+            new_driver.add_listener(self._indexes)
+            self._standings.add_driver(new_driver, len(self.drivers))
             self.drivers.append(new_driver)
+            self._standings.size = (len(self.drivers), len(self.grand_prix))
+            self._indexes.size = self._standings.size
+            self._drivers_by_name[name] = new_driver
             return new_driver
         return None
 
-    def get_driver_result(self, sorted_key: Callable[[Driver], tuple] = lambda d:
-                        (-d.best_grand_prix.laps, d.best_grand_prix.time)) -> List[Driver]:
+    def get_grand_prix_by_id(self, grand_prix_id: int) -> GrandPrix:
+        '''
+        Returns a grand prix by its ID.
+
+        Parameters
+        ------------
+        grand_prix_id: 'int'
+            The ID of the grand prix to be returned.
+
+        Returns
+        ------------
+        GrandPrix
+            GrandPrix object if found, otherwise None.
+        '''
+        if len(self._grand_prix_by_id) != len(self.grand_prix):
+            self._grand_prix_by_id = {gp.id: gp for gp in self.grand_prix}
+        return self._grand_prix_by_id.get(grand_prix_id)
+
+    def _current_standings(self) -> Standings:
+        '''Returns the rankings with all added results, they are built again if needed.'''
+        standings = self._standings
+        if standings.size != (len(self.drivers), len(self.grand_prix)):
+            standings.valid = False
+        standings.update(self.drivers, self.grand_prix[-1].results if self.grand_prix else [])
+        standings.size = (len(self.drivers), len(self.grand_prix))
+        return standings
+
+    def driver_standings(self, order: str = "best", limit: int = None) -> List[Driver]:
+        '''
+        Returns the drivers in ranking order without sorting them.
+        Drivers with equal values keep the order in which they joined the championship.
+
+        Parameters
+        ------------
+        order: 'str', default "best"
+            "best" ranks by the best grand prix (laps, then time), "total" by total laps
+            and total time, "fastest" by the fastest lap.
+        limit: 'int', default None
+            Optional number of drivers from the top of the ranking.
+
+        Returns
+        ------------
+        list
+            List of Driver objects in ranking order.
+        '''
+        if order not in Standings.ORDERS:
+            raise ValueError(f"Unknown order {order}")
+        return self._current_standings().rankings[order].items(limit)
+
+    def driver_rank(self, driver: Driver, order: str = "best") -> int:
+        '''
+        Returns the rank of a driver, 1 is the leader.
+
+        Parameters
+        ------------
+        driver: 'Driver'
+            The driver of this championship.
+        order: 'str', default "best"
+            The ranking, see `driver_standings`.
+
+        Returns
+        ------------
+        int
+            The rank of the driver, or None if the driver has no result.
+        '''
+        if order not in Standings.ORDERS:
+            raise ValueError(f"Unknown order {order}")
+        index = self._current_standings().rankings[order].index(driver)
+        return index + 1 if index is not None else None
+
+    def driver_neighbours(self, driver: Driver, order: str = "best") -> Tuple[Driver, Driver]:
+        '''
+        Returns the drivers ranked directly in front of and behind a driver, e.g. for gaps.
+
+        Parameters
+        ------------
+        driver: 'Driver'
+            The driver of this championship.
+        order: 'str', default "best"
+            The ranking, see `driver_standings`.
+
+        Returns
+        ------------
+        tuple
+            The driver in front and the driver behind, None at the ends of the ranking.
+        '''
+        if order not in Standings.ORDERS:
+            raise ValueError(f"Unknown order {order}")
+        return self._current_standings().rankings[order].neighbours(driver)
+
+    def get_driver_result(self, sorted_key: Callable[[Driver], tuple] = None) -> List[Driver]:
         '''
         Returns the best result of all drivers
         
         Parameters
         ------------
         sorted_key: 'Callable', default None
-            Optional parameter to sort the Driver objects. Default is sorting by laps and time.
+            Optional parameter to sort the Driver objects. Default is the ranking by
+            laps and time of the best grand prix, which is read without sorting.
 
         Returns
         ------------
         list
             List of Driver objects sorted by best grand prix results.
         '''
+        if sorted_key is None:
+            return self.driver_standings("best")
         if not self.drivers:
             return []
         sorted_drivers = sorted(self.drivers, key=sorted_key)
         return sorted_drivers
 
-    def get_race_result(self, sort_key: Callable[[RaceResult], tuple] = lambda rr:
-                        (-rr.laps, rr.time)) -> List[RaceResult]:
+    def get_race_result(self, sort_key: Callable[[RaceResult], tuple] = None
+                        ) -> List[RaceResult]:
         '''
         Returns the best result of all drivers
         
@@ -132,9 +293,9 @@ class Championship:
         list
             List of sorted RaceResult objects by laps and time.
         '''
-        if not self.drivers:
-            return []
-        drivers_best_results = [d.get_best_race() for d in self.drivers]
+        if sort_key is None:
+            return [d.best_grand_prix for d in self.driver_standings("best")]
+        drivers_best_results = [d.best_grand_prix for d in self.drivers if d.race_results]
         sorted_drivers = sorted(drivers_best_results, key=sort_key)
         return sorted_drivers
 
@@ -147,10 +308,63 @@ class Championship:
         list
             List of Driver objects sorted by results.
         '''
-        last_grand_prix = self.grand_prix[-1] if self.grand_prix else None
-        sorted_gp = sorted(last_grand_prix.results,
-                           key=lambda r: (-r.laps, r.time)) if last_grand_prix else []
-        return sorted_gp
+        return self._current_standings().last_grand_prix.items()
+
+    def _current_indexes(self) -> ResultIndexes:
+        '''Returns the secondary indexes with all added results, they are built again if needed.'''
+        indexes = self._indexes
+        if not indexes.valid or indexes.size != (len(self.drivers), len(self.grand_prix)):
+            indexes.rebuild([r for gp in self.grand_prix for r in gp.results])
+            indexes.size = (len(self.drivers), len(self.grand_prix))
+        indexes.update()
+        return indexes
+
+    def car_statistics(self) -> List[CarStatistics]:
+        '''
+        Returns the statistics of every car model, ranked by the best result driven with it.
+
+        Returns
+        ------------
+        list
+            List of CarStatistics objects with the number of results and drivers,
+            the best result and the result with the fastest lap of the car.
+        '''
+        return sorted(self._current_indexes().cars.values(),
+                      key=lambda c: (-c.best_result.laps, c.best_result.time))
+
+    def get_car_statistics(self, car: str) -> CarStatistics:
+        '''Returns the statistics of a car model, or None if it was not driven.'''
+        return self._current_indexes().cars.get(car)
+
+    def get_grand_prix_result(self, grand_prix_id: int, name: str) -> RaceResult:
+        '''Returns the result of a driver in a grand prix, or None if the driver did not start.'''
+        return self._current_indexes().grand_prix.get(grand_prix_id, {}).get(name)
+
+    def head_to_head(self, name: str, opponent: str) -> HeadToHead:
+        '''
+        Returns the grands prix in which a driver finished ahead of or behind another driver.
+
+        Parameters
+        ------------
+        name: 'str'
+            The name of the driver.
+        opponent: 'str'
+            The name of the opponent.
+
+        Returns
+        ------------
+        HeadToHead
+            The number of meetings, the grands prix won and lost against the opponent
+            and the ID of the last meeting. The first query of a pair reads all results
+            of both drivers.
+        '''
+        if name == opponent:
+            raise ValueError("A driver has no head-to-head record against itself")
+        driver = self.get_driver_by_name(name, create=False)
+        other = self.get_driver_by_name(opponent, create=False)
+        return self._current_indexes().head_to_head(
+            name, driver.race_results if driver else [],
+            opponent, other.race_results if other else [])
 
     def get_grand_prix_index(self) -> int:
         '''
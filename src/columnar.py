@@ -0,0 +1,328 @@
+'''
+Columnar results store backed by NumPy arrays.
+All results are kept in contiguous columns, standings and per-driver values are computed
+with vectorized group-by and lexsort operations. Drivers and results are thin views
+over the columns. NumPy is an optional dependency, it is only needed for this module.
+'''
+
+from typing import Callable
+from typing import Dict
+from typing import List
+from src.championship import Championship, GrandPrix
+from src.race import RaceResult
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class NameTable:
+    '''Interns names to consecutive integer ids.'''
+
+    def __init__(self):
+        self.names : List[str] = []
+        self._ids : Dict[str, int] = {}
+
+    def intern(self, name:str) -> int:
+        '''Returns the id of a name and assigns a new one if it is unknown.'''
+        index = self._ids.get(name)
+        if index is None:
+            index = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def get(self, name:str) -> int:
+        '''Returns the id of a name or None if it is unknown.'''
+        return self._ids.get(name)
+
+
+class ResultView:
+    '''Read-only view of a single result in the columnar store.'''
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store:'ColumnarResults', index:int):
+        self._store = store
+        self._index = index
+
+    @property
+    def position(self) -> int:
+        '''return the position of the driver'''
+        return int(self._store.position[self._index])
+
+    @property
+    def driver(self) -> str:
+        '''return the name of the driver'''
+        return self._store.driver_names[self._store.driver_id[self._index]]
+
+    @property
+    def laps(self) -> int:
+        '''return the number of laps of the driver'''
+        return int(self._store.laps[self._index])
+
+    @property
+    def time(self) -> int:
+        '''return the time'''
+        return int(self._store.time[self._index])
+
+    @property
+    def car(self) -> str:
+        '''return the name of the car'''
+        return self._store.car_names[self._store.car_id[self._index]]
+
+    @property
+    def best_lap_time(self) -> int:
+        '''return the best lap time'''
+        return int(self._store.best_lap_time[self._index])
+
+    @property
+    def race_id(self) -> int:
+        '''return the id of the race result'''
+        return int(self._store.grand_prix_id[self._index])
+
+    def __str__(self):
+        return (f"Race(Position: {self.position}, Driver: {self.driver}, Laps: {self.laps}, "
+                f"Time: {self.time}, Car: {self.car}, Best Lap Time: {self.best_lap_time}, "
+                f"Race Number: {self.race_id})")
+
+
+class DriverView:
+    '''Read-only view of a driver in the columnar store.'''
+    __slots__ = ("_store", "_driver_id")
+
+    def __init__(self, store:'ColumnarResults', driver_id:int):
+        self._store = store
+        self._driver_id = driver_id
+
+    @property
+    def name(self) -> str:
+        '''returns the name of the driver'''
+        return self._store.driver_names[self._driver_id]
+
+    @property
+    def race_results(self) -> List[ResultView]:
+        '''returns all results of the driver'''
+        indices = np.flatnonzero(self._store.driver_id == self._driver_id)
+        return [ResultView(self._store, i) for i in indices.tolist()]
+
+    @property
+    def total_laps(self) -> int:
+        '''returns the total number of laps of the driver'''
+        return int(self._store.aggregates()["total_laps"][self._driver_id])
+
+    @property
+    def total_time(self) -> int:
+        '''returns the total time of the driver'''
+        return int(self._store.aggregates()["total_time"][self._driver_id])
+
+    @property
+    def number_of_grands_prix(self) -> int:
+        '''returns number of races'''
+        return int(self._store.aggregates()["count"][self._driver_id])
+
+    @property
+    def best_grand_prix(self) -> ResultView:
+        '''returns the best grand prix of the driver, most laps first, then least time'''
+        return ResultView(self._store, int(self._store.aggregates()["best"][self._driver_id]))
+
+    @property
+    def fastest_lap_race_result(self) -> ResultView:
+        '''returns race result with the fastest lap of the driver'''
+        return ResultView(self._store, int(self._store.aggregates()["fastest"][self._driver_id]))
+
+    @property
+    def fastest_lap(self) -> int:
+        '''returns the time of the fastest lap of the driver'''
+        return self.fastest_lap_race_result.best_lap_time
+
+
+class ColumnarResults:
+    '''
+    Stores the results of a championship in NumPy columns.
+    Driver and car names are interned to integer ids. The columns grow by doubling,
+    so appending a result is amortized O(1). Aggregates are computed once per change.
+    '''
+
+    _COLUMNS = ("laps", "time", "best_lap_time", "position", "grand_prix_id",
+                "driver_id", "car_id")
+
+    def __init__(self, name:str = "", capacity:int = 1024):
+        '''Initializes an empty store, raises ImportError if NumPy is not installed.'''
+        if np is None:
+            raise ImportError("The columnar results store requires NumPy")
+        self.name = name
+        self.driver_table = NameTable()
+        self.car_table = NameTable()
+        self._columns = {column: np.zeros(capacity, dtype=np.int64) for column in self._COLUMNS}
+        self._size = 0
+        self._aggregates = None
+        self._last_grand_prix_id = None
+
+    @classmethod
+    def from_championship(cls, championship:Championship) -> 'ColumnarResults':
+        '''
+        Creates a columnar store holding all results of a championship.
+
+        Parameters
+        ------------
+        championship: Championship
+            The championship to be converted.
+
+        Returns
+        ------------
+        ColumnarResults
+            The store containing all results.
+        '''
+        size = sum(len(gp.results) for gp in championship.grand_prix)
+        store = cls(championship.name, max(size, 1))
+        for grand_prix in championship.grand_prix:
+            store.add_result(grand_prix)
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getattr__(self, column:str):
+        '''Returns the filled part of a column, e.g. `store.laps`.'''
+        if column in self._COLUMNS:
+            return self._columns[column][:self._size]
+        raise AttributeError(column)
+
+    @property
+    def driver_names(self) -> List[str]:
+        '''Returns the driver names indexed by driver id.'''
+        return self.driver_table.names
+
+    @property
+    def car_names(self) -> List[str]:
+        '''Returns the car names indexed by car id.'''
+        return self.car_table.names
+
+    def _reserve(self, count:int) -> None:
+        '''Grows the columns to hold at least `count` more results.'''
+        capacity = len(self._columns["laps"])
+        if self._size + count <= capacity:
+            return
+        while capacity < self._size + count:
+            capacity *= 2
+        for column, values in self._columns.items():
+            grown = np.zeros(capacity, dtype=values.dtype)
+            grown[:self._size] = values[:self._size]
+            self._columns[column] = grown
+
+    def append(self, race_result:RaceResult) -> None:
+        '''
+        Appends a single result to the columns.
+
+        Parameters
+        ------------
+        race_result: RaceResult
+            The RaceResult to be added.
+        '''
+        self._reserve(1)
+        row = self._size
+        self._columns["laps"][row] = race_result.laps
+        self._columns["time"][row] = race_result.time
+        self._columns["best_lap_time"][row] = race_result.best_lap_time
+        self._columns["position"][row] = race_result.position
+        self._columns["grand_prix_id"][row] = race_result.race_id
+        self._columns["driver_id"][row] = self.driver_table.intern(race_result.driver)
+        self._columns["car_id"][row] = self.car_table.intern(race_result.car)
+        self._size += 1
+        self._aggregates = None
+
+    def add_result(self, grandprix:GrandPrix) -> None:
+        '''
+        Appends all results of a grand prix to the columns.
+
+        Parameters
+        ------------
+        grandprix: GrandPrix
+            The GrandPrix to be added.
+        '''
+        self._reserve(len(grandprix.results))
+        for race_result in grandprix.results:
+            self.append(race_result)
+        self._last_grand_prix_id = grandprix.id
+
+    def aggregates(self) -> Dict[str, 'np.ndarray']:
+        '''
+        Returns the per-driver values indexed by driver id.
+        Keys are total_laps, total_time, count, best (row of the best grand prix)
+        and fastest (row of the fastest lap).
+        '''
+        if self._aggregates is not None:
+            return self._aggregates
+        drivers = len(self.driver_names)
+        driver_id = self.driver_id
+        # lexsort is stable, so on ties the earliest result of a driver comes first
+        best_order = np.lexsort((self.time, -self.laps, driver_id))
+        fastest_order = np.lexsort((self.best_lap_time, driver_id))
+        first_best = np.unique(driver_id[best_order], return_index=True)[1]
+        first_fastest = np.unique(driver_id[fastest_order], return_index=True)[1]
+        self._aggregates = {
+            "total_laps": np.bincount(driver_id, weights=self.laps,
+                                      minlength=drivers).astype(np.int64),
+            "total_time": np.bincount(driver_id, weights=self.time,
+                                      minlength=drivers).astype(np.int64),
+            "count": np.bincount(driver_id, minlength=drivers),
+            "best": best_order[first_best],
+            "fastest": fastest_order[first_fastest],
+        }
+        return self._aggregates
+
+    @property
+    def drivers(self) -> List[DriverView]:
+        '''Returns views of all drivers in the order of their first result.'''
+        return [DriverView(self, i) for i in range(len(self.driver_names))]
+
+    def ranking(self, order:str = "best") -> 'np.ndarray':
+        '''
+        Returns the driver ids in ranking order, computed with a vectorized sort.
+
+        Parameters
+        ------------
+        order: str, default "best"
+            "best" ranks by the best grand prix (laps, then time), "total" by total laps
+            and total time, "fastest" by the fastest lap.
+
+        Returns
+        ------------
+        np.ndarray
+            Array of driver ids in ranking order.
+        '''
+        if not self._size:
+            return np.zeros(0, dtype=np.int64)
+        agg = self.aggregates()
+        if order == "best":
+            return np.lexsort((self.time[agg["best"]], -self.laps[agg["best"]]))
+        if order == "total":
+            return np.lexsort((agg["total_time"], -agg["total_laps"]))
+        if order == "fastest":
+            return np.argsort(self.best_lap_time[agg["fastest"]], kind="stable")
+        raise ValueError(f"Unknown order {order}")
+
+    def driver_standings(self, order:str = "best") -> List[DriverView]:
+        '''Returns views of the drivers in ranking order, see `ranking` for the orders.'''
+        return [DriverView(self, i) for i in self.ranking(order).tolist()]
+
+    def get_driver_result(self, sorted_key:Callable[[DriverView], tuple] = None
+                          ) -> List[DriverView]:
+        '''
+        Returns the drivers ranked by their best grand prix, like Championship.get_driver_result.
+        A custom sort key falls back to sorting the driver views in Python.
+        '''
+        if sorted_key is None:
+            return self.driver_standings("best")
+        return sorted(self.drivers, key=sorted_key)
+
+    def get_race_result(self) -> List[ResultView]:
+        '''Returns the best result of every driver sorted by laps and time.'''
+        return [d.best_grand_prix for d in self.driver_standings("best")]
+
+    def get_driver_result_last_grand_prix(self) -> List[ResultView]:
+        '''Returns the results of the last grand prix sorted by laps and time.'''
+        if self._last_grand_prix_id is None:
+            return []
+        rows = np.flatnonzero(self.grand_prix_id == self._last_grand_prix_id)
+        ranking = rows[np.lexsort((self.time[rows], -self.laps[rows]))]
+        return [ResultView(self, i) for i in ranking.tolist()]
@@ -0,0 +1,278 @@
+'''
+Monitors several championships at once.
+Every championship has its own results file, name and output directory. The files are
+watched in the main process, parsing and rendering run in worker processes, so a large
+file does not delay the championships of the other workers and all cores are used.
+
+Every championship is refreshed by a fixed worker, the championships are dealt to the
+workers in the order of the configuration. A worker keeps the parsed results of its
+championships in memory between refreshes, so all workers together hold every
+championship once, and the snapshot is only loaded by the first refresh.
+
+The championships are configured in a JSON file:
+
+    {
+        "championships": [
+            {"name": "GT", "file": "results/gt.txt", "output": "output/gt"},
+            {"name": "Formula", "file": "results/formula.txt", "output": "output/formula"}
+        ]
+    }
+
+The parsed state of a championship is saved in its output directory, see `src.snapshot`.
+'''
+
+import os
+import json
+import contextlib
+import logging
+import queue
+import signal
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+from src.decode_methods import CockpitXPTailParser
+from src.renderer import PageRenderer, PageDependencies, generate_changed_pages
+from src.watcher import FileWatcher, create_watcher
+from src.metrics import Metrics
+
+SNAPSHOT_NAME = ".results_snapshot.json"
+
+class ChampionshipConfig(NamedTuple):
+    '''A monitored championship.'''
+    name: str
+    file_path: str
+    output_dir: str
+    snapshot_path: str
+
+
+class RefreshResult(NamedTuple):
+    '''The outcome of a refresh in a worker process.'''
+    name: str
+    updated: bool
+    pages: List[str]
+    partial_record: bool
+    errors: List[str]
+
+
+def load_config(path:str) -> List[ChampionshipConfig]:
+    '''
+    Reads the championships from a JSON configuration file.
+    Relative paths are resolved against the directory of the configuration file.
+
+    Parameters
+    ------------
+    path: str
+        The configuration file.
+
+    Returns
+    ------------
+    list
+        List of ChampionshipConfig objects.
+
+    Raises
+    ------------
+    ValueError
+        If the configuration is invalid, e.g. a name or an output directory is used twice.
+    '''
+    with open(path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    base = os.path.dirname(os.path.abspath(path))
+    entries = data.get("championships") if isinstance(data, dict) else None
+    if not entries:
+        raise ValueError(f"No championships configured in {path}")
+
+    configs = []
+    for entry in entries:
+        if not isinstance(entry, dict) or not entry.get("name") or not entry.get("file"):
+            raise ValueError(f"A championship needs a name and a file: {entry!r}")
+        output_dir = os.path.join(base, entry.get("output", os.path.join("output", entry["name"])))
+        configs.append(ChampionshipConfig(
+            entry["name"], os.path.join(base, entry["file"]), output_dir,
+            os.path.join(base, entry.get("snapshot", os.path.join(output_dir, SNAPSHOT_NAME)))))
+
+    for field in ("name", "output_dir"):
+        values = [getattr(config, field) for config in configs]
+        if len(set(values)) != len(values):
+            raise ValueError(f"Every championship needs its own {field.replace('_', ' ')}")
+    return configs
+
+
+# Parser and page dependencies of the championships of this worker process
+_WORKER_STATE : Dict[str, Tuple[CockpitXPTailParser, PageDependencies]] = {}
+
+def _init_worker(template_cache_dir:str, log_level:int) -> None:
+    '''
+    Compiles the templates once per worker process and logs like the main process.
+    Ctrl-C is ignored by the workers, the main process shuts the pool down.
+    '''
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    logging.basicConfig(level=log_level, format="%(message)s")
+    PageRenderer.set_shared(PageRenderer(cache_dir=template_cache_dir))
+
+def refresh_championship(config:ChampionshipConfig, finish:bool = False) -> RefreshResult:
+    '''
+    Reads the appended results of a championship and generates its changed pages.
+    Runs in the worker process of the championship, which keeps its parser between
+    refreshes. The first refresh restores the parser from the snapshot.
+
+    Parameters
+    ------------
+    config: ChampionshipConfig
+        The championship to be refreshed.
+    finish: bool, default False
+        Also reads an unterminated last line, see `CockpitXPTailParser.update`.
+
+    Returns
+    ------------
+    RefreshResult
+        Whether results were added, the generated pages and whether an unterminated
+        line is left.
+    '''
+    state = _WORKER_STATE.get(config.name)
+    if state is None:
+        parser = CockpitXPTailParser(config.file_path, config.name, config.snapshot_path)
+        parser.load_snapshot()
+        state = _WORKER_STATE[config.name] = (parser, PageDependencies())
+    parser, dependencies = state
+
+    updated = parser.update(finish)
+    errors = [str(error) for error in parser.errors]
+    pages = []
+    if parser.championship.grand_prix:
+        os.makedirs(config.output_dir, exist_ok=True)
+        pages = generate_changed_pages(parser.championship, dependencies, config.output_dir)
+        parser.save_snapshot()
+    if pages:
+        Metrics.shared().end_cycle(championship=config.name, pages=pages)
+    return RefreshResult(config.name, updated, pages, parser.has_partial_record, errors)
+
+
+class ChampionshipDaemon: # pylint: disable=too-many-instance-attributes
+    '''
+    Watches the results files of several championships and refreshes them in worker processes.
+    Each worker is a pool of one process refreshing a fixed share of the championships,
+    changes during a refresh are combined into one further refresh. An unterminated last
+    line is read when it is final, see `CockpitXPTailParser.finish_due`.
+    '''
+
+    POLL_INTERVAL = 1
+
+    def __init__(self, configs:List[ChampionshipConfig], workers:int = None,
+                 template_cache_dir:str = None):
+        '''
+        Initializes the daemon.
+
+        Parameters
+        ------------
+        configs: List[ChampionshipConfig]
+            The monitored championships.
+        workers: int, default None
+            Number of worker processes, by default one per championship up to the number of cores.
+        template_cache_dir: str, default None
+            Optional bytecode cache of the templates shared by the workers.
+        '''
+        self.configs = {config.name: config for config in configs}
+        self.workers = workers or min(len(configs), os.cpu_count() or 1)
+        self._shards = {name: index % self.workers for index, name in enumerate(self.configs)}
+        self.template_cache_dir = template_cache_dir
+        self._events : queue.Queue = queue.Queue()
+        self._running : Dict[str, Future] = {}
+        self._pending : Dict[str, bool] = {}
+        self._partial : Dict[str, float] = {}
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        '''Refreshes all championships, then keeps them up to date until interrupted.'''
+        watchers = [(name, create_watcher(config.file_path))
+                    for name, config in self.configs.items()]
+        threads = [threading.Thread(target=self._watch, args=(name, watcher), daemon=True)
+                   for name, watcher in watchers]
+        with contextlib.ExitStack() as stack:
+            # the workers are spawned, forking a process with running watcher threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            initargs = (self.template_cache_dir, logging.getLogger().getEffectiveLevel())
+            pools = [stack.enter_context(ProcessPoolExecutor(1, context, initializer=_init_worker,
+                                                             initargs=initargs))
+                     for _ in range(self.workers)]
+            try:
+                for name in self.configs:
+                    self._submit(pools, name, False)
+                for thread in threads:
+                    thread.start()
+                while not self._stopped.is_set():
+                    try:
+                        event = self._events.get(timeout=self.POLL_INTERVAL)
+                    except queue.Empty:
+                        event = None
+                    self._handle(pools, event)
+            finally:
+                self._stopped.set()
+                for thread in threads:
+                    if thread.is_alive():
+                        thread.join()
+                for _, watcher in watchers:
+                    watcher.close()
+
+    def stop(self) -> None:
+        '''Stops the daemon after the running refreshes.'''
+        self._stopped.set()
+
+    def _watch(self, name:str, watcher:FileWatcher) -> None:
+        '''Reports the changes of one results file to the main loop.'''
+        while not self._stopped.is_set():
+            if watcher.wait(self.POLL_INTERVAL):
+                self._events.put(("changed", name, None))
+
+    def _submit(self, pools:List[ProcessPoolExecutor], name:str, finish:bool) -> None:
+        '''
+        Starts a refresh in the worker of the championship, or combines it with the running
+        one of the same championship.
+        '''
+        if name in self._running:
+            self._pending[name] = self._pending.get(name, True) and finish
+            return
+        future = pools[self._shards[name]].submit(refresh_championship, self.configs[name], finish)
+        self._running[name] = future
+        future.add_done_callback(lambda done: self._events.put(("done", name, done)))
+
+    def _handle(self, pools:List[ProcessPoolExecutor], event:tuple) -> None:
+        '''Processes an event of a watcher or a worker, and finishes quiet unterminated lines.'''
+        if event is not None:
+            kind, name, future = event
+            if kind == "changed":
+                self._partial.pop(name, None)
+                self._submit(pools, name, False)
+            else:
+                del self._running[name]
+                self._finished(name, future)
+                if name in self._pending:
+                    self._submit(pools, name, self._pending.pop(name))
+
+        for name, checked in list(self._partial.items()):
+            try:
+                mtime = os.path.getmtime(self.configs[name].file_path)
+            except FileNotFoundError:
+                continue
+            if name not in self._running and CockpitXPTailParser.finish_due(mtime, checked):
+                self._partial[name] = mtime
+                self._submit(pools, name, True)
+
+    def _finished(self, name:str, future:Future) -> None:
+        '''Reports the result of a refresh.'''
+        try:
+            result = future.result()
+        except Exception as error: # pylint: disable=broad-exception-caught
+            print(f"{name}: refresh failed: {error!r}")
+            return
+        for error in result.errors:
+            print(f"{name}: skipped malformed line: {error}")
+        if result.pages:
+            print(f"{name}: updated {', '.join(result.pages)}")
+        if result.partial_record:
+            self._partial.setdefault(name, None)
+        else:
+            self._partial.pop(name, None)
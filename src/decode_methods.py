@@ -2,10 +2,57 @@
 Methods to decode the results from different formats.
 '''
 
+import os
 import re
+import sys
+import mmap
+import time
 import datetime
+from typing import Dict
+from typing import Iterator
+from typing import List
 from src.championship import GrandPrix, Championship
 from src.race import RaceResult
+from src.metrics import Metrics
+from src import snapshot
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Column layout of a cockpitXP result line as (field, width), the last field takes the rest.
+COCKPITXP_COLUMNS = (
+    ("driver", 25),
+    ("car", 55),
+    ("laps", 6),
+    ("time", 10),
+    ("position", 3),
+    ("best_lap_time", None),
+)
+
+def _column_slices(columns) -> dict[str, slice]:
+    '''Converts a list of (field, width) columns to slices.'''
+    slices = {}
+    start = 0
+    for field, width in columns:
+        end = start + width if width is not None else None
+        slices[field] = slice(start, end)
+        start = end
+    return slices
+
+_COCKPITXP_SLICES = _column_slices(COCKPITXP_COLUMNS)
+COCKPITXP_MIN_LENGTH = _COCKPITXP_SLICES["best_lap_time"].start
+
+
+class CockpitXPFormatError(ValueError):
+    '''Raised when a line of a cockpitXP file cannot be decoded.'''
+
+    def __init__(self, line_number:int, field:str, value:str):
+        self.line_number = line_number
+        self.field = field
+        self.value = value
+        location = f"line {line_number}" if line_number is not None else "line"
+        super().__init__(f"Malformed cockpitXP record in {location}: "
+                         f"invalid {field} {value.strip()!r}")
+
 
 def remove_extra_whitespaces(text:str) -> str:
     '''
@@ -21,7 +68,188 @@ def remove_extra_whitespaces(text:str) -> str:
     str
         The string with extra whitespaces removed.
     '''
-    return re.sub(r'\s+', ' ', text).strip()
+    return _WHITESPACE.sub(' ', text).strip()
+
+def decode_raw_line(raw_line:bytes, line_number:int = None) -> str:
+    '''
+    Decodes a line read from a cockpitXP file and normalizes its line ending.
+
+    Raises
+    ------------
+    CockpitXPFormatError
+        If the line is not valid UTF-8, the error holds the line number.
+    '''
+    try:
+        return raw_line.decode("utf-8").replace("\r\n", "\n")
+    except UnicodeDecodeError as error:
+        raise CockpitXPFormatError(line_number, "UTF-8 text",
+                                   raw_line.decode("utf-8", errors="replace")) from error
+
+
+class CockpitXPNames:
+    '''
+    Normalizes the driver and car columns of cockpitXP lines.
+    The tables are keyed by the raw fixed-width column, so a name that was seen before costs
+    one dict lookup instead of the character set round trip and the whitespace collapsing.
+    The normalized names are interned, all results and drivers share one string per name.
+    '''
+
+    _shared : 'CockpitXPNames' = None
+
+    def __init__(self, max_size:int = 65536):
+        '''
+        Initializes empty tables.
+
+        Parameters
+        ------------
+        max_size: int, default 65536
+            Maximum number of raw columns per table, a full table is cleared.
+        '''
+        self.max_size = max_size
+        self._drivers : Dict[str, str] = {}
+        self._cars : Dict[str, str] = {}
+
+    @classmethod
+    def shared(cls) -> 'CockpitXPNames':
+        '''Returns the tables shared by all decoders, they are created on first use.'''
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def set_shared(cls, names:'CockpitXPNames') -> None:
+        '''Replaces the shared tables, e.g. by empty ones to measure a cold start.'''
+        cls._shared = names
+
+    def __len__(self) -> int:
+        return len(self._drivers) + len(self._cars)
+
+    def driver(self, raw:str) -> str:
+        '''Returns the normalized driver name of a raw column, an empty string if it is blank.'''
+        name = self._drivers.get(raw)
+        if name is None:
+            name = sys.intern(" ".join(raw.encode("cp273", "ignore").decode("cp273").split()))
+            if len(self._drivers) >= self.max_size:
+                self._drivers.clear()
+            self._drivers[raw] = name
+        return name
+
+    def car(self, raw:str) -> str:
+        '''Returns the normalized car name of a raw column.'''
+        name = self._cars.get(raw)
+        if name is None:
+            name = sys.intern(" ".join(raw.split()))
+            if len(self._cars) >= self.max_size:
+                self._cars.clear()
+            self._cars[raw] = name
+        return name
+
+
+def decode_line_cockpitxp(line:str, race_id:int, line_number:int = None) -> RaceResult:
+    '''
+    Decodes a single result line in the cockpitXP format.
+    The columns are fixed, see `COCKPITXP_COLUMNS`, so the fields are sliced directly.
+    Driver and car names are normalized once per distinct column, see `CockpitXPNames`.
+
+    Parameters
+    ------------
+    line: str
+        The line to be decoded.
+    race_id: int
+        The ID of the grand prix the result belongs to.
+    line_number: int, default None
+        The number of the line in the file, used for error messages.
+
+    Returns
+    ------------
+    RaceResult
+        The decoded RaceResult, or None if the line does not hold a result.
+
+    Raises
+    ------------
+    CockpitXPFormatError
+        If a numeric field cannot be converted.
+    '''
+    if len(line) < COCKPITXP_MIN_LENGTH:
+        return None
+
+    columns = _COCKPITXP_SLICES
+    names = CockpitXPNames.shared()
+    name = names.driver(line[columns["driver"]])
+    if not name:
+        return None
+
+    return RaceResult.from_values(
+        _decode_int(line, "position", line_number),
+        name,
+        _decode_int(line, "laps", line_number),
+        _decode_int(line, "time", line_number),
+        names.car(line[columns["car"]]),
+        _decode_int(line, "best_lap_time", line_number),
+        race_id)
+
+
+def _decode_int(line:str, field:str, line_number:int) -> int:
+    '''Converts a numeric column of a cockpitXP line.'''
+    raw = line[_COCKPITXP_SLICES[field]]
+    try:
+        return int(raw)
+    except ValueError as error:
+        raise CockpitXPFormatError(line_number, field, raw) from error
+
+
+def iter_grand_prix_cockpitxp(file_path:str,
+                              date:datetime.datetime = None) -> Iterator[GrandPrix]:
+    '''
+    Reads a file in the cockpitXP format and yields one GrandPrix at a time.
+    The file is memory-mapped and a grand prix is yielded as soon as the next `----`
+    separator closes it, so archives of any size are processed in constant memory.
+
+    Parameters
+    ------------
+    file_path: str
+        The path to the file to be parsed.
+    date: datetime.datetime, default None
+        The date assigned to the grands prix, defaults to now.
+
+    Yields
+    ------------
+    GrandPrix
+        The grands prix in the order of the file, numbered from 1.
+
+    Raises
+    ------------
+    CockpitXPFormatError
+        If a line cannot be decoded, the error holds the line number.
+    '''
+    date = date or datetime.datetime.now()
+    with open(file_path, "rb") as reader:
+        if not os.fstat(reader.fileno()).st_size:
+            return
+        with mmap.mmap(reader.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            grand_prix : GrandPrix = None
+            grand_prix_id = 0
+            for line_number, raw_line in enumerate(iter(data.readline, b""), 1):
+                line = decode_raw_line(raw_line, line_number)
+                if line.startswith("----"):
+                    if grand_prix:
+                        yield grand_prix
+                    grand_prix_id += 1
+                    grand_prix = GrandPrix(grand_prix_id, f"Grand Prix {grand_prix_id}",
+                                           date, "")
+                    continue
+
+                _res = decode_line_cockpitxp(line, grand_prix_id if grand_prix
+                                             else grand_prix_id + 1, line_number)
+                if _res:
+                    if grand_prix is None:
+                        grand_prix_id += 1
+                        grand_prix = GrandPrix(grand_prix_id, f"Grand Prix {grand_prix_id}",
+                                               date, "")
+                    grand_prix.add_race_result(_res)
+
+            if grand_prix:
+                yield grand_prix
 
 
 def parse_results_cockpitxp(file_path:str) -> Championship:
@@ -38,36 +266,333 @@ def parse_results_cockpitxp(file_path:str) -> Championship:
     ------------
     Championchip
         The Championchip object containing the parsed results.
+
+    Raises
+    ------------
+    CockpitXPFormatError
+        If a line cannot be decoded, the error holds the line number.
     '''
-    grand_prix : GrandPrix = None
     championchip = Championship("Ferraro", datetime.datetime.now())
+    for grand_prix in iter_grand_prix_cockpitxp(file_path, championchip.date):
+        championchip.add_result(grand_prix)
+    return championchip
 
-    with open(file_path, "r", encoding="utf-8") as reader:
-        for line in reader:
-            if line.startswith("----"):
-                if grand_prix:
-                    championchip.add_result(grand_prix)
-                grand_prix = championchip.create_grand_prix()
-                continue
-            if len(line) < 99:
-                continue
 
-            name = line[:25].rstrip().encode("cp273", "ignore").decode("cp273")
-            if not re.sub(r'\s+', '', name):
-                continue
-            name = remove_extra_whitespaces(name)
+class CockpitXPTailParser: # pylint: disable=too-many-instance-attributes
+    '''
+    Incremental parser for results files in the cockpitXP format.
 
-            result = {'driver': name}
+    The parser remembers how far the file has been read and which grand prix is still open.
+    Each call to `update` only decodes the lines appended since the previous call and adds
+    them to the existing championship. If the file was truncated or replaced, or if the
+    first or last parsed bytes no longer match, the file is parsed again from the beginning.
+    A malformed line is skipped, the other lines of the update are still decoded and the
+    errors of the last update are kept in `errors`.
 
-            result['car'] = remove_extra_whitespaces(line[25:80])
-            result['laps'] = int(re.sub(r'\s+', '', line[80:86]))
-            result['time'] = int(re.sub(r'\s+', '', line[86:96]))
-            result['position'] = int(re.sub(r'\s+', '', line[96:99]))
-            result['best_lap_time'] = int(re.sub(r'\s+', '', line[99:]))
-            result['id'] = grand_prix.id
+    With a snapshot path the parsed state can be saved with `save_snapshot` and
+    restored with `load_snapshot` after a restart.
 
-            _res = RaceResult(result)
-            grand_prix.add_race_result(_res)
+    A trailing line without line break is a record that is still being written. If the
+    file is not changed for `PARTIAL_RECORD_TIMEOUT` seconds, the writer has finished and
+    the line can be consumed with `update(finish=True)`, `due_for_finish` tells when.
+    '''
 
-    championchip.add_result(grand_prix)
-    return championchip
+    _FINGERPRINT_SIZE = 256
+    PARTIAL_RECORD_TIMEOUT = 5
+
+    def __init__(self, file_path:str, name:str = "Ferraro", snapshot_path:str = None):
+        '''
+        Initializes the parser.
+
+        Parameters
+        ------------
+        file_path: str
+            The results file.
+        name: str, default "Ferraro"
+            The name of the championship.
+        snapshot_path: str, default None
+            Optional file the parsed state is saved to and restored from.
+        '''
+        self._file_path = file_path
+        self._snapshot_path = snapshot_path
+        self._championship = Championship(name, datetime.datetime.now())
+        self._grand_prix : GrandPrix = None
+        self._offset = 0
+        self._line_number = 0
+        self._inode = None
+        self._fingerprint = (b'', b'')
+        self._prefix_hash = snapshot.new_prefix_hash()
+        self._partial = 0
+        self._finished_mtime : float = None
+        self._errors : List[CockpitXPFormatError] = []
+        self._saved : snapshot.SnapshotPosition = None
+        self._saved_source : dict = None
+
+    @property
+    def championship(self) -> Championship:
+        '''Returns the championship holding all results parsed so far.'''
+        return self._championship
+
+    @property
+    def offset(self) -> int:
+        '''Returns the number of bytes of the file that have been parsed.'''
+        return self._offset
+
+    @property
+    def errors(self) -> List[CockpitXPFormatError]:
+        '''Returns the malformed lines skipped by the last update.'''
+        return self._errors
+
+    @property
+    def has_partial_record(self) -> bool:
+        '''Returns True if the file ended with an unterminated line at the last update.'''
+        return self._partial > 0
+
+    @classmethod
+    def finish_due(cls, mtime:float, finished:float = None) -> bool:
+        '''
+        Decides whether an unterminated last line is final. It is once the file has not
+        been changed for `PARTIAL_RECORD_TIMEOUT` seconds, and only once per modification
+        time, a line that is too short to be a record is not read again until the file
+        changes.
+
+        Parameters
+        ------------
+        mtime: float
+            The modification time of the file.
+        finished: float, default None
+            The modification time at which the line was last finished.
+        '''
+        return mtime != finished and time.time() - mtime >= cls.PARTIAL_RECORD_TIMEOUT
+
+    def due_for_finish(self, mtime:float) -> bool:
+        '''
+        Returns True if the unterminated last line should now be read with
+        `update(finish=True)`, see `finish_due`. The modification time is remembered,
+        so the line is finished once per modification of the file.
+        '''
+        if not self.has_partial_record or not self.finish_due(mtime, self._finished_mtime):
+            return False
+        self._finished_mtime = mtime
+        return True
+
+    def reset(self) -> None:
+        '''Forgets all parsed results, the next update parses the whole file.'''
+        self._championship = Championship(self._championship.name, datetime.datetime.now())
+        self._grand_prix = None
+        self._offset = 0
+        self._line_number = 0
+        self._inode = None
+        self._fingerprint = (b'', b'')
+        self._prefix_hash = snapshot.new_prefix_hash()
+        self._partial = 0
+        self._finished_mtime = None
+        self._saved = None
+        self._saved_source = None
+
+    def save_snapshot(self) -> bool:
+        '''
+        Saves the parsed state to the snapshot path.
+        Only the results added since the last save are appended, see `src.snapshot`.
+
+        Returns
+        ------------
+        bool
+            True if the snapshot was written, False if it was unchanged or
+            no snapshot path is set.
+        '''
+        if not self._snapshot_path or not self._offset:
+            return False
+        try:
+            stat = os.stat(self._file_path)
+        except FileNotFoundError:
+            return False
+        if stat.st_ino != self._inode:
+            return False
+        source = {"device": stat.st_dev, "inode": stat.st_ino, "size": self._offset,
+                  "hash": self._prefix_hash.hexdigest(), "line_number": self._line_number}
+        if self._saved is not None and source == self._saved_source:
+            return False
+        with Metrics.shared().stage("snapshot"):
+            self._saved = snapshot.write_snapshot(self._snapshot_path, source,
+                                                  self._championship, self._saved)
+        self._saved_source = source
+        return True
+
+    def load_snapshot(self) -> bool:
+        '''
+        Restores the parsed state from the snapshot path.
+        The snapshot is only used if it was saved for the same file and the file still
+        starts with the parsed bytes, the next update then decodes only the appended lines.
+
+        Returns
+        ------------
+        bool
+            True if the snapshot was loaded, otherwise the state is unchanged.
+        '''
+        if not self._snapshot_path:
+            return False
+        with Metrics.shared().stage("restore"):
+            data = snapshot.read_snapshot(self._snapshot_path)
+            source = data["source"] if data else None
+            try:
+                stat = os.stat(self._file_path)
+                if (not source or (stat.st_dev, stat.st_ino) != (source["device"], source["inode"])
+                        or stat.st_size < source["size"]):
+                    return False
+                with open(self._file_path, "rb") as reader:
+                    prefix_hash = snapshot.prefix_hash(reader, source["size"])
+                    if prefix_hash is None or prefix_hash.hexdigest() != source["hash"]:
+                        return False
+                    size = source["size"]
+                    reader.seek(0)
+                    head = reader.read(min(size, self._FINGERPRINT_SIZE))
+                    reader.seek(max(0, size - self._FINGERPRINT_SIZE))
+                    tail = reader.read(min(size, self._FINGERPRINT_SIZE))
+                championship = snapshot.load_championship(data["championship"])
+                line_number = int(source["line_number"])
+            except (OSError, KeyError, TypeError, ValueError):
+                return False
+        self._championship = championship
+        self._grand_prix = championship.grand_prix[-1] if championship.grand_prix else None
+        self._offset = size
+        self._line_number = line_number
+        self._inode = stat.st_ino
+        self._fingerprint = (head, tail)
+        self._prefix_hash = prefix_hash
+        self._saved = data["position"]
+        self._saved_source = source
+        return True
+
+    def update(self, finish:bool = False) -> bool:
+        '''
+        Decodes the lines appended to the file since the last update.
+        Only complete lines are consumed, a trailing line without line break is
+        left for the next update, so a record that is still being written is never decoded.
+
+        Parameters
+        ------------
+        finish: bool, default False
+            Also consumes a trailing line without line break if it has the length of a
+            complete record, e.g. the last line of a file that is no longer written.
+
+        Returns
+        ------------
+        bool
+            True if the championship has changed or a line was skipped, otherwise False.
+            The skipped malformed lines are reported in `errors`.
+        '''
+        self._errors = []
+        chunk, full_reparse = self._read_appended()
+        if chunk is None:
+            return False
+
+        end = chunk.rfind(b"\n") + 1
+        if finish and self._is_complete_record(chunk[end:]):
+            end = len(chunk)
+        self._partial = len(chunk) - end
+        if not end:
+            return full_reparse
+
+        start = time.perf_counter()
+        records = self._decode_lines(chunk[:end])
+        decoded = time.perf_counter()
+        results = 0
+        for record in records:
+            results += self._add(record)
+        built = time.perf_counter()
+        self._advance(chunk[:end])
+
+        metrics = Metrics.shared()
+        metrics.observe("parse", decoded - start)
+        metrics.observe("build", built - decoded)
+        metrics.increment("bytes_parsed", end)
+        metrics.increment("results_parsed", results)
+        if self._errors:
+            metrics.increment("malformed_lines", len(self._errors))
+        if full_reparse:
+            metrics.increment("full_reparses")
+        return True
+
+    def _read_appended(self) -> tuple:
+        '''
+        Returns the bytes after the parsed part of the file, or None if the file does not exist,
+        and whether the file was rewritten, in that case the parsed state was reset.
+        '''
+        try:
+            stat = os.stat(self._file_path)
+        except FileNotFoundError:
+            return None, False
+
+        with open(self._file_path, "rb") as reader:
+            full_reparse = self._is_rewritten(stat, reader)
+            if full_reparse:
+                self.reset()
+            self._inode = stat.st_ino
+            reader.seek(self._offset)
+            return reader.read(), full_reparse
+
+    @staticmethod
+    def _is_complete_record(data:bytes) -> bool:
+        '''Checks whether an unterminated line is long enough to hold a complete record.'''
+        line = data.rstrip(b"\r")
+        return line.startswith(b"----") or len(line) > COCKPITXP_MIN_LENGTH
+
+    def _advance(self, data:bytes) -> None:
+        '''Marks the data as parsed and updates the fingerprint of the parsed bytes.'''
+        head, tail = self._fingerprint
+        if len(head) < self._FINGERPRINT_SIZE:
+            head = (head + data)[:self._FINGERPRINT_SIZE]
+        self._fingerprint = (head, (tail + data)[-self._FINGERPRINT_SIZE:])
+        self._prefix_hash.update(data)
+        self._offset += len(data)
+
+    def _is_rewritten(self, stat:os.stat_result, reader) -> bool:
+        '''Checks whether the already parsed part of the file has changed.'''
+        if not self._offset:
+            return False
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            return True
+        head, tail = self._fingerprint
+        if reader.read(len(head)) != head:
+            return True
+        reader.seek(self._offset - len(tail))
+        return reader.read(len(tail)) != tail
+
+    def _decode_lines(self, data:bytes) -> list:
+        '''
+        Decodes complete lines before they are added to the championship.
+        Returns the separator strings for new grands prix and the RaceResults, malformed
+        lines are skipped and added to `errors`. The IDs of the grands prix opened by the
+        lines are the ones `_add` creates them with.
+        '''
+        race_id = self._grand_prix.id if self._grand_prix else None
+        next_id = self._championship.get_grand_prix_index()
+        records = []
+        for raw_line in data.splitlines(keepends=True):
+            self._line_number += 1
+            try:
+                line = decode_raw_line(raw_line, self._line_number)
+                if line.startswith("----"):
+                    records.append(line)
+                    race_id, next_id = next_id, next_id + 1
+                    continue
+                record = decode_line_cockpitxp(line, race_id or next_id, self._line_number)
+            except CockpitXPFormatError as error:
+                self._errors.append(error)
+                continue
+            if record is not None:
+                records.append(record)
+                if race_id is None:
+                    race_id, next_id = next_id, next_id + 1
+        return records
+
+    def _add(self, record) -> int:
+        '''Adds a decoded line to the championship, returns the number of added results.'''
+        if isinstance(record, str) or self._grand_prix is None:
+            self._grand_prix = self._championship.create_grand_prix()
+            self._championship.add_result(self._grand_prix)
+        if isinstance(record, str):
+            return 0
+        self._championship.add_race_result(self._grand_prix, record)
+        return 1
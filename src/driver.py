@@ -1,14 +1,36 @@
 '''all race results of a driver'''
 from typing import List
+from typing import Tuple
 from src.race import RaceResult
 
-class Driver:
-    '''Driver class assignes races.'''
+class Driver: # pylint: disable=too-many-instance-attributes
+    '''
+    Driver class assignes races.
+    Totals, best grand prix and fastest lap are updated when a race is added,
+    so reading them does not walk the race results. If a race result is changed
+    afterwards, the values are computed again on the next access and the listeners
+    of the driver are informed.
+    '''
     def __init__(self, name: str):
         self._name = name
         self.race_results: List[RaceResult] = []
+        self._total_laps = 0
+        self._total_time = 0
+        self._best_grand_prix : RaceResult = None
+        self._fastest_lap_race_result : RaceResult = None
+        self._aggregated = 0
+        self._listeners = ()
 
-    def add_race(self, race_result:RaceResult) -> None:
+    def add_listener(self, listener) -> None:
+        '''
+        Registers an object to be informed when a race result of the driver changes.
+        The listener has to provide a method `race_result_changed(race_result)`,
+        an object that is already registered is not added again.
+        '''
+        if listener not in self._listeners:
+            self._listeners += (listener,)
+
+    def add_race(self, race_result:RaceResult) -> Tuple[bool, bool]:
         '''
         Adds a race to the driver.
         
@@ -16,8 +38,57 @@ class Driver:
         ------------
         race_result: RaceResult
             The RaceResult to be added.
+
+        Returns
+        ------------
+        tuple
+            Whether the race may have changed the best grand prix and the fastest lap
+            of the driver, both are True if the aggregated values are outdated.
         '''
         self.race_results.append(race_result)
+        race_result.add_listener(self)
+        if self._aggregated == len(self.race_results) - 1:
+            return self._aggregate(race_result)
+        return True, True
+
+    def race_result_changed(self, race_result:RaceResult) -> None:
+        '''Invalidates the aggregated values after a race result was changed.'''
+        self._aggregated = -1
+        for listener in self._listeners:
+            listener.race_result_changed(race_result)
+
+    def _aggregate(self, race_result:RaceResult) -> Tuple[bool, bool]:
+        '''
+        Adds a race result to the aggregated values.
+        Returns whether it became the best grand prix and the fastest lap of the driver.
+        '''
+        laps = race_result.laps
+        time = race_result.time
+        self._total_laps += laps
+        self._total_time += time
+        best = self._best_grand_prix
+        new_best = (best is None or laps > best.laps
+                    or (laps == best.laps and time < best.time))
+        if new_best:
+            self._best_grand_prix = race_result
+        fastest = self._fastest_lap_race_result
+        new_fastest = fastest is None or race_result.best_lap_time < fastest.best_lap_time
+        if new_fastest:
+            self._fastest_lap_race_result = race_result
+        self._aggregated += 1
+        return new_best, new_fastest
+
+    def _refresh(self) -> None:
+        '''Computes the aggregated values again if a race result has changed.'''
+        if self._aggregated == len(self.race_results):
+            return
+        self._total_laps = 0
+        self._total_time = 0
+        self._best_grand_prix = None
+        self._fastest_lap_race_result = None
+        self._aggregated = 0
+        for race_result in self.race_results:
+            self._aggregate(race_result)
 
     @property
     def name(self) -> str:
@@ -27,12 +98,14 @@ class Driver:
     @property
     def total_laps(self) -> int:
         '''returns the total number of laps of the driver'''
-        return sum(r.laps for r in self.race_results)
+        self._refresh()
+        return self._total_laps
 
     @property
     def total_time(self) -> int:
         '''returns the total time of the driver'''
-        return sum(r.time for r in self.race_results)
+        self._refresh()
+        return self._total_time
 
     @property
     def number_of_grands_prix(self) -> int:
@@ -45,11 +118,8 @@ class Driver:
         Returns the best grand prix of the driver.
         The best grand prix is the one with the most laps completed.'
         '''
-        if not self.race_results:
-            return None
-        # Max rounds, then min time
-        best_race = min(self.race_results, key=lambda r: (-r.laps, r.time))
-        return best_race
+        self._refresh()
+        return self._best_grand_prix
 
     @property
     def fastest_lap_race_result(self) -> RaceResult:
@@ -61,10 +131,8 @@ class Driver:
         result: RaceResult
             RaceResult with the fastest lap of the driver.
         '''
-        if not self.race_results:
-            return None
-        best_race = min(self.race_results, key=lambda r: (r.best_lap_time))
-        return best_race
+        self._refresh()
+        return self._fastest_lap_race_result
 
     @property
     def fastest_lap(self) -> int:
@@ -0,0 +1,276 @@
+'''
+Machine-readable standings feed.
+The template data of a page is published as a compact JSON document and in a binary format,
+together with a delta holding only the rows that changed since the previous update.
+Every update has a sequence number, a delta names the sequence number it is based on, so a
+consumer that missed an update fetches the full document again.
+
+Both formats hold the same frame:
+
+    page         the page name, see `renderer.PAGES`
+    kind         "full" or "delta"
+    seq          sequence number of the update
+    base         sequence number the delta applies to, 0 for a full frame
+    length       number of rows of the table after the update
+    last_update  time of the update
+    fastest_lap  fastest lap shown in the header, empty if the page has none
+    fields       names of the row values
+    rows         [index, values] of every row in a full frame, of the changed rows in a delta
+
+Binary layout, little endian: the header `<4sBBIIH` (magic, version, kind, seq, base, length),
+the strings page, last_update and fastest_lap, the number of fields as byte followed by the
+field names, the number of rows as uint16, then every row as uint16 index and its values.
+A string is a uint16 byte length and UTF-8, a value is a type byte (0 empty, 1 int64, 2 string)
+followed by the int64 or the string.
+'''
+
+import os
+import json
+import struct
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Tuple
+from src.output import PageWriter
+
+FEED_VERSION = 1
+FEED_MAGIC = b"SCGP"
+FEED_DIR = "feed"
+
+_HEADER = struct.Struct("<4sBBIIH")
+_UINT16 = struct.Struct("<H")
+_INT64 = struct.Struct("<q")
+_KINDS = ("full", "delta")
+
+
+class FeedFrame(NamedTuple):
+    '''A full or delta update of the standings of one page.'''
+    page: str
+    kind: str
+    seq: int
+    base: int
+    length: int
+    last_update: str
+    fastest_lap: str
+    fields: Tuple[str, ...]
+    rows: List[Tuple[int, tuple]]
+
+    def to_json(self) -> bytes:
+        '''Encodes the frame as compact JSON.'''
+        document = {"version": FEED_VERSION, "page": self.page, "kind": self.kind,
+                    "seq": self.seq, "base": self.base, "length": self.length,
+                    "last_update": self.last_update, "fastest_lap": self.fastest_lap,
+                    "fields": self.fields,
+                    "rows": [[index, list(values)] for index, values in self.rows]}
+        return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def to_binary(self) -> bytes:
+        '''Encodes the frame in the binary format described in the module.'''
+        parts = [_HEADER.pack(FEED_MAGIC, FEED_VERSION, _KINDS.index(self.kind), self.seq,
+                              self.base, self.length)]
+        for text in (self.page, self.last_update, self.fastest_lap):
+            _pack_string(parts, text)
+        parts.append(bytes((len(self.fields),)))
+        for field in self.fields:
+            _pack_string(parts, field)
+        parts.append(_UINT16.pack(len(self.rows)))
+        for index, values in self.rows:
+            parts.append(_UINT16.pack(index))
+            for value in values:
+                if value is None or value == "":
+                    parts.append(b"\x00")
+                elif isinstance(value, int):
+                    parts.append(b"\x01" + _INT64.pack(value))
+                else:
+                    parts.append(b"\x02")
+                    _pack_string(parts, str(value))
+        return b"".join(parts)
+
+    @classmethod
+    def from_json(cls, data:bytes) -> 'FeedFrame':
+        '''Decodes a frame encoded by `to_json`.'''
+        document = json.loads(data)
+        if document.get("version") != FEED_VERSION:
+            raise ValueError(f"Unsupported feed version {document.get('version')}")
+        return cls(document["page"], document["kind"], document["seq"], document["base"],
+                   document["length"], document["last_update"], document["fastest_lap"],
+                   tuple(document["fields"]),
+                   [(index, tuple(values)) for index, values in document["rows"]])
+
+    @classmethod
+    def from_binary(cls, data:bytes) -> 'FeedFrame':
+        '''Decodes a frame encoded by `to_binary`, empty values are returned as "".'''
+        magic, version, kind, seq, base, length = _HEADER.unpack_from(data)
+        if magic != FEED_MAGIC or version != FEED_VERSION:
+            raise ValueError("Not a standings feed frame of a supported version")
+        texts, offset = _unpack_strings(data, _HEADER.size, 3)
+        fields, offset = _unpack_strings(data, offset + 1, data[offset])
+        rows = _unpack_rows(data, offset, len(fields))
+        return cls(texts[0], _KINDS[kind], seq, base, length, texts[1], texts[2],
+                   tuple(fields), rows)
+
+    def apply(self, rows:List[tuple]) -> List[tuple]:
+        '''Returns the rows of the table after this frame, `rows` are the rows before.'''
+        table = [] if self.kind == "full" else list(rows[:self.length])
+        table.extend([()] * (self.length - len(table)))
+        for index, values in self.rows:
+            table[index] = values
+        return table
+
+
+def _pack_string(parts:list, text:str) -> None:
+    '''Appends a length-prefixed UTF-8 string.'''
+    encoded = text.encode("utf-8")
+    parts.append(_UINT16.pack(len(encoded)))
+    parts.append(encoded)
+
+def _unpack_string(data:bytes, offset:int) -> Tuple[str, int]:
+    '''Reads a length-prefixed UTF-8 string, returns it and the offset after it.'''
+    size, = _UINT16.unpack_from(data, offset)
+    start = offset + _UINT16.size
+    return data[start:start + size].decode("utf-8"), start + size
+
+def _unpack_strings(data:bytes, offset:int, count:int) -> Tuple[List[str], int]:
+    '''Reads `count` strings, returns them and the offset after them.'''
+    strings = []
+    for _ in range(count):
+        text, offset = _unpack_string(data, offset)
+        strings.append(text)
+    return strings, offset
+
+def _unpack_rows(data:bytes, offset:int, width:int) -> List[Tuple[int, tuple]]:
+    '''Reads the number of rows and the rows with `width` values each.'''
+    count, = _UINT16.unpack_from(data, offset)
+    offset += _UINT16.size
+    rows = []
+    for _ in range(count):
+        index, = _UINT16.unpack_from(data, offset)
+        offset += _UINT16.size
+        values = []
+        for _ in range(width):
+            value, offset = _unpack_value(data, offset)
+            values.append(value)
+        rows.append((index, tuple(values)))
+    return rows
+
+def _unpack_value(data:bytes, offset:int) -> Tuple[object, int]:
+    '''Reads a typed value, returns it and the offset after it.'''
+    kind = data[offset]
+    if kind == 0:
+        return "", offset + 1
+    if kind == 1:
+        return _INT64.unpack_from(data, offset + 1)[0], offset + 1 + _INT64.size
+    return _unpack_string(data, offset + 1)
+
+
+class FeedUpdate(NamedTuple):
+    '''The encoded frames of one update.'''
+    full: FeedFrame
+    delta: FeedFrame
+
+
+class StandingsFeed:
+    '''
+    Produces the feed frames of the pages.
+    The previous rows and sequence number of every page are kept in memory. When the feed
+    is written to files, they are read back from the full JSON document if it was written
+    by another process, so the sequence numbers continue after a restart.
+    '''
+
+    _shared : 'StandingsFeed' = None
+
+    def __init__(self):
+        '''Initializes the feed without any known page.'''
+        self._frames : Dict[str, FeedFrame] = {}
+        self._files : Dict[str, tuple] = {}
+
+    @classmethod
+    def shared(cls) -> 'StandingsFeed':
+        '''Returns the feed shared by all pages, it is created on first use.'''
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def update(self, page:str, data:dict, key:str = None) -> FeedUpdate:
+        '''
+        Creates the full and the delta frame of a page.
+
+        Parameters
+        ------------
+        page: str
+            The name of the page.
+        data: dict
+            The template data of the page, see `renderer.prepare_page`.
+        key: str, default None
+            Identifies the feed of the page if several are kept, e.g. its file path.
+
+        Returns
+        ------------
+        FeedUpdate
+            The new frames, or None if the rows and the fastest lap have not changed.
+        '''
+        key = key or page
+        results = data["results"]
+        fields = tuple(results[0]) if results else ()
+        rows = [tuple(result.values()) for result in results]
+        fastest_lap = data.get("fastest_lap", "")
+        previous = self._frames.get(key)
+        if previous is None or previous.fields != fields:
+            seq = previous.seq + 1 if previous else 1
+            base, old_rows = 0, []
+        else:
+            seq, base, old_rows = previous.seq + 1, previous.seq, [v for _, v in previous.rows]
+        changed = [(index, values) for index, values in enumerate(rows)
+                   if index >= len(old_rows) or old_rows[index] != values]
+        if (base and not changed and len(rows) == len(old_rows)
+                and previous.fastest_lap == fastest_lap):
+            return None
+
+        full = FeedFrame(page, "full", seq, 0, len(rows), data["last_update"], fastest_lap,
+                         fields, list(enumerate(rows)))
+        delta = full._replace(kind="delta", base=base, rows=changed) if base else full
+        self._frames[key] = full
+        return FeedUpdate(full, delta)
+
+    def publish(self, page:str, data:dict, output_dir:str = "output") -> FeedUpdate:
+        '''
+        Updates the feed of a page and writes it to `<output_dir>/feed`:
+        `<page>.json` and `<page>.bin` hold the full frame, `<page>.delta.json` and
+        `<page>.delta.bin` the delta frame.
+
+        Returns
+        ------------
+        FeedUpdate
+            The written frames, or None if the page has not changed.
+        '''
+        directory = os.path.join(output_dir, FEED_DIR)
+        full_path = os.path.join(directory, f"{page}.json")
+        self._load(full_path)
+        update = self.update(page, data, full_path)
+        if update is None:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        writer = PageWriter.shared()
+        base = os.path.join(directory, page)
+        writer.write(f"{base}.delta.json", update.delta.to_json().decode("utf-8"))
+        writer.write_bytes(f"{base}.delta.bin", update.delta.to_binary())
+        writer.write_bytes(f"{base}.bin", update.full.to_binary())
+        writer.write(full_path, update.full.to_json().decode("utf-8"))
+        stat = os.stat(full_path)
+        self._files[full_path] = (stat.st_mtime_ns, stat.st_size)
+        return update
+
+    def _load(self, full_path:str) -> None:
+        '''Reads the previous frame from the file if it was not written by this feed.'''
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            return
+        if self._files.get(full_path) == (stat.st_mtime_ns, stat.st_size):
+            return
+        try:
+            with open(full_path, "rb") as file:
+                self._frames[full_path] = FeedFrame.from_json(file.read())
+        except (OSError, KeyError, TypeError, ValueError):
+            self._frames.pop(full_path, None)
+        self._files[full_path] = (stat.st_mtime_ns, stat.st_size)
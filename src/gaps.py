@@ -0,0 +1,78 @@
+'''
+Gaps to the leader and intervals to the car in front for a ranked field.
+The laps and times of all entries are passed as columns and all differences are
+computed in one pass. The formatted times are cached, lap times and small gaps
+repeat a lot between pages and refreshes.
+'''
+
+from functools import lru_cache
+from typing import List
+from typing import Sequence
+from typing import Tuple
+
+@lru_cache(maxsize=16384)
+def format_time(milliseconds:int) -> str:
+    '''
+    Converts milliseconds to a formatted time string.
+
+    Parameters
+    ------------
+    milliseconds: int
+        The time in milliseconds to be converted.
+
+    Returns
+    ------------
+    str
+        The formatted time string in the format "m:ss.fff".
+    '''
+    minutes, rest = divmod(int(milliseconds), 60000)
+    seconds, millis = divmod(rest, 1000)
+    return f"{minutes}:{seconds:02}.{millis:03}"
+
+@lru_cache(maxsize=256)
+def format_laps(laps:int) -> str:
+    '''Returns the text of a gap of whole laps, e.g. "1 Lap" or "3 Laps".'''
+    return "1 Lap" if laps == 1 else f"{laps} Laps"
+
+def format_times(times:Sequence[int]) -> List[str]:
+    '''Formats a column of times.'''
+    return [format_time(time) for time in times]
+
+def gaps(times:Sequence[int], laps:Sequence[int] = None) -> Tuple[List[str], List[str]]:
+    '''
+    Computes the gap to the leader and the interval to the entry in front for a ranked field.
+    An entry on the same lap is behind by the time difference, otherwise by the number of laps.
+    The leader has empty values.
+
+    Parameters
+    ------------
+    times: Sequence[int]
+        The times in milliseconds in ranking order.
+    laps: Sequence[int], default None
+        The completed laps in ranking order. Without laps, e.g. for lap times, only the
+        time differences are used.
+
+    Returns
+    ------------
+    tuple
+        The list of gaps and the list of intervals, one value for each entry.
+    '''
+    if not times:
+        return [], []
+    if laps is None:
+        lead_time = times[0]
+        gap = [""] + [format_time(time - lead_time) for time in times[1:]]
+        interval = [""] + [format_time(time - front) for front, time in zip(times, times[1:])]
+        return gap, interval
+
+    lead_laps, lead_time = laps[0], times[0]
+    gap = [""]
+    interval = [""]
+    front_laps, front_time = lead_laps, lead_time
+    for lap_count, time in zip(laps[1:], times[1:]):
+        gap.append(format_time(time - lead_time) if lap_count == lead_laps
+                   else format_laps(lead_laps - lap_count))
+        interval.append(format_time(time - front_time) if lap_count == front_laps
+                        else format_laps(front_laps - lap_count))
+        front_laps, front_time = lap_count, time
+    return gap, interval
@@ -0,0 +1,174 @@
+'''
+Secondary indexes over the results of a championship.
+The results are indexed by car and by grand prix, head-to-head records of two drivers
+are kept per pair. Every index only reads the results added since it was last asked for,
+so none of the questions needs a scan over all results. A head-to-head record is built
+when a pair is first asked for, that first query reads all results of both drivers.
+'''
+
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Set
+from typing import Tuple
+from src.race import RaceResult
+
+class CarStatistics: # pylint: disable=too-few-public-methods
+    '''Results of one car model.'''
+    __slots__ = ("car", "results", "drivers", "best_result", "fastest_lap_result")
+
+    def __init__(self, car:str):
+        self.car = car
+        self.results = 0
+        self.drivers : Set[str] = set()
+        self.best_result : RaceResult = None
+        self.fastest_lap_result : RaceResult = None
+
+    def add(self, race_result:RaceResult) -> None:
+        '''Adds a result driven with this car.'''
+        self.results += 1
+        self.drivers.add(race_result.driver)
+        best = self.best_result
+        laps = race_result.laps
+        if (best is None or laps > best.laps
+                or (laps == best.laps and race_result.time < best.time)):
+            self.best_result = race_result
+        fastest = self.fastest_lap_result
+        if fastest is None or race_result.best_lap_time < fastest.best_lap_time:
+            self.fastest_lap_result = race_result
+
+
+class HeadToHead(NamedTuple):
+    '''
+    The grands prix two drivers took part in and which of them finished ahead.
+    `won_races` and `lost_races` are the IDs of the grands prix the driver finished ahead
+    of and behind the opponent, in the order the results were added.
+    '''
+    driver: str
+    opponent: str
+    meetings: int
+    won: int
+    lost: int
+    last_meeting: int
+    won_races: Tuple[int, ...] = ()
+    lost_races: Tuple[int, ...] = ()
+
+
+class _PairRecord: # pylint: disable=too-few-public-methods
+    '''Head-to-head record of a pair of drivers, kept up to date on request.'''
+    __slots__ = ("read", "counted", "won", "lost", "last_meeting")
+
+    def __init__(self):
+        self.read = [0, 0]
+        self.counted : Set[int] = set()
+        self.won : List[int] = []
+        self.lost : List[int] = []
+        self.last_meeting = 0
+
+
+class ResultIndexes:
+    '''
+    Results by car, by grand prix and head-to-head records by pair of drivers.
+    Added results are queued and indexed by car and grand prix on the next `update`.
+    A pair record is created when it is first asked for, which costs a pass over the
+    results of both drivers, and then only reads their new results. If a result is changed
+    afterwards, all indexes are built again on the next read.
+    '''
+
+    def __init__(self):
+        '''Initializes empty indexes.'''
+        self.cars : Dict[str, CarStatistics] = {}
+        self.grand_prix : Dict[int, Dict[str, RaceResult]] = {}
+        self._pairs : Dict[Tuple[str, str], _PairRecord] = {}
+        self._pending : List[RaceResult] = []
+        self.valid = True
+        self.size = (0, 0)
+
+    def add(self, race_result:RaceResult) -> None:
+        '''Queues a result for the car and grand prix indexes.'''
+        self._pending.append(race_result)
+
+    def update(self) -> None:
+        '''Adds the queued results to the car and grand prix indexes.'''
+        cars, grand_prix = self.cars, self.grand_prix
+        for race_result in self._pending:
+            statistics = cars.get(race_result.car)
+            if statistics is None:
+                statistics = cars[race_result.car] = CarStatistics(race_result.car)
+            statistics.add(race_result)
+            results = grand_prix.get(race_result.race_id)
+            if results is None:
+                results = grand_prix[race_result.race_id] = {}
+            results[race_result.driver] = race_result
+        self._pending.clear()
+
+    def race_result_changed(self, _race_result:RaceResult) -> None:
+        '''Marks the indexes as outdated after a race result of a driver was changed.'''
+        self.valid = False
+
+    def rebuild(self, race_results:List[RaceResult]) -> None:
+        '''Builds the indexes again from all results.'''
+        self.cars.clear()
+        self.grand_prix.clear()
+        self._pairs.clear()
+        self._pending = list(race_results)
+        self.update()
+        self.valid = True
+
+    def head_to_head(self, driver:str, driver_results:List[RaceResult],
+                     opponent:str, opponent_results:List[RaceResult]) -> HeadToHead:
+        '''
+        Returns the head-to-head record of two drivers.
+        A driver wins a meeting with more laps, or with the same laps in less time.
+        The first query of a pair reads all results of both drivers, later queries only
+        the results added since.
+
+        Parameters
+        ------------
+        driver: str
+            The name of the driver.
+        driver_results: List[RaceResult]
+            All results of the driver in the order they were added.
+        opponent: str
+            The name of the opponent.
+        opponent_results: List[RaceResult]
+            All results of the opponent in the order they were added.
+
+        Returns
+        ------------
+        HeadToHead
+            The grands prix the driver won and lost against the opponent and the ID of
+            the last grand prix both took part in, 0 if they never met.
+        '''
+        self.update()
+        swapped = opponent < driver
+        key = (opponent, driver) if swapped else (driver, opponent)
+        record = self._pairs.get(key)
+        if record is None:
+            record = self._pairs[key] = _PairRecord()
+        first, second = (opponent_results, driver_results) if swapped else (driver_results,
+                                                                            opponent_results)
+        for side, results in enumerate((first, second)):
+            for race_result in results[record.read[side]:]:
+                self._count(record, key, race_result.race_id)
+            record.read[side] = len(results)
+
+        won, lost = (record.lost, record.won) if swapped else (record.won, record.lost)
+        return HeadToHead(driver, opponent, len(record.counted), len(won), len(lost),
+                          record.last_meeting, tuple(won), tuple(lost))
+
+    def _count(self, record:_PairRecord, key:Tuple[str, str], race_id:int) -> None:
+        '''Counts a grand prix for a pair if both drivers have a result in it.'''
+        if race_id in record.counted:
+            return
+        results = self.grand_prix.get(race_id, {})
+        first, second = results.get(key[0]), results.get(key[1])
+        if first is None or second is None:
+            return
+        record.counted.add(race_id)
+        record.last_meeting = max(record.last_meeting, race_id)
+        first_key, second_key = (-first.laps, first.time), (-second.laps, second.time)
+        if first_key < second_key:
+            record.won.append(race_id)
+        elif second_key < first_key:
+            record.lost.append(race_id)
@@ -0,0 +1,157 @@
+'''
+Timing and counter hooks for the refresh pipeline.
+Every refresh cycle is logged as one JSON line, and all values can be written
+to a text file in the Prometheus exposition format, no server is required.
+'''
+
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict
+from typing import Iterator
+from typing import Tuple
+from src.output import PageWriter
+
+LOGGER = logging.getLogger(__name__)
+
+_Key = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+def _key(name:str, labels:dict) -> _Key:
+    '''Returns a hashable key of a metric name and its labels.'''
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _escape(value:str) -> str:
+    '''Escapes a label value for the Prometheus exposition format.'''
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels:tuple) -> str:
+    '''Formats labels in the Prometheus exposition format.'''
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    '''
+    Collects stage timings, counters and gauges of the pipeline.
+    The values are guarded by a lock, the stages may run on different threads.
+    '''
+
+    PREFIX = "slotcar"
+    _STAGE_FAMILIES = (
+        ("stage_seconds_total", "counter", "Time spent in each pipeline stage."),
+        ("stage_runs_total", "counter", "Number of runs of each pipeline stage."),
+        ("stage_last_seconds", "gauge", "Duration of the last run of each stage."),
+    )
+
+    _shared : 'Metrics' = None
+
+    def __init__(self):
+        '''Initializes empty metrics.'''
+        self._stages : Dict[_Key, list] = {}
+        self._counters : Dict[_Key, float] = {}
+        self._gauges : Dict[_Key, float] = {}
+        self._cycle : Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls) -> 'Metrics':
+        '''Returns the metrics shared by the whole pipeline, created on first use.'''
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @contextmanager
+    def stage(self, name:str, **labels) -> Iterator[None]:
+        '''
+        Measures the time spent in the `with` block as a pipeline stage.
+
+        Parameters
+        ------------
+        name: str
+            The name of the stage, e.g. "parse" or "render".
+        labels:
+            Additional labels, e.g. page="grand_prix".
+        '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def observe(self, name:str, seconds:float, **labels) -> None:
+        '''Adds a measured duration in seconds to a stage.'''
+        key = _key(name, labels)
+        cycle_name = ".".join([name] + [str(v) for _, v in sorted(labels.items())])
+        with self._lock:
+            stats = self._stages.setdefault(key, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = seconds
+            self._cycle[cycle_name] = self._cycle.get(cycle_name, 0.0) + seconds
+
+    def increment(self, name:str, value:float = 1, **labels) -> None:
+        '''Increments a counter.'''
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name:str, value:float, **labels) -> None:
+        '''Sets a gauge to the given value.'''
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def end_cycle(self, **fields) -> dict:
+        '''
+        Finishes a refresh cycle and logs its stage timings as one JSON line.
+
+        Parameters
+        ------------
+        fields:
+            Additional values of the cycle, e.g. the update-to-visible latency.
+
+        Returns
+        ------------
+        dict
+            The logged record, durations are in milliseconds.
+        '''
+        self.increment("refreshes")
+        with self._lock:
+            cycle, self._cycle = self._cycle, {}
+        record = {"event": "refresh", "time": time.time()}
+        record.update({f"{name}_ms": round(seconds * 1000, 3) for name, seconds in cycle.items()})
+        record.update(fields)
+        LOGGER.info(json.dumps(record, separators=(",", ":")))
+        return record
+
+    def _families(self) -> dict:
+        '''Returns the samples of all metrics grouped by (name, type, description).'''
+        families = {}
+        with self._lock:
+            for (name, labels), (runs, total, last) in sorted(self._stages.items()):
+                labels = (("stage", name),) + labels
+                for family, value in zip(self._STAGE_FAMILIES, (total, runs, last)):
+                    families.setdefault(family, []).append((labels, value))
+            for (name, labels), value in sorted(self._counters.items()):
+                families.setdefault((f"{name}_total", "counter", ""), []).append((labels, value))
+            for (name, labels), value in sorted(self._gauges.items()):
+                families.setdefault((name, "gauge", ""), []).append((labels, value))
+        return families
+
+    def prometheus_text(self) -> str:
+        '''Returns all metrics in the Prometheus text exposition format.'''
+        lines = []
+        for (name, kind, description), samples in self._families().items():
+            metric = f"{self.PREFIX}_{name}"
+            if description:
+                lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {kind}")
+            lines += [f"{metric}{_format_labels(labels)} {value:.6g}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path:str) -> None:
+        '''Writes the metrics atomically to a text file, e.g. for the node exporter.'''
+        PageWriter.shared().write(path, self.prometheus_text())
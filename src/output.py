@@ -0,0 +1,98 @@
+'''
+Writes the generated pages to disk.
+A page is only written if its content has changed, and it is replaced atomically,
+so a browser never reads a half-written file.
+'''
+
+import os
+import hashlib
+from typing import Dict
+from typing import Iterable
+
+class PageWriter:
+    '''Writes pages atomically and skips pages whose content has not changed.'''
+
+    _shared : 'PageWriter' = None
+
+    def __init__(self):
+        '''Initializes the writer without any known page.'''
+        self._hashes : Dict[str, str] = {}
+
+    @classmethod
+    def shared(cls) -> 'PageWriter':
+        '''Returns the writer shared by all pages, it is created on first use.'''
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def content_hash(content:str, volatile:Iterable[str] = ()) -> str:
+        '''
+        Returns the hash of the content without the volatile values.
+
+        Parameters
+        ------------
+        content: str
+            The rendered page.
+        volatile: Iterable[str]
+            Values that change on every render, e.g. the time of the last update.
+
+        Returns
+        ------------
+        str
+            The hash of the content.
+        '''
+        for value in volatile:
+            if value:
+                content = content.replace(value, "")
+        return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+    def write(self, path:str, content:str, volatile:Iterable[str] = ()) -> bool:
+        '''
+        Writes the page if its content has changed since the last write.
+        The content is written to a temporary file in the same directory
+        which then replaces the page.
+
+        Parameters
+        ------------
+        path: str
+            The path of the page.
+        content: str
+            The rendered page.
+        volatile: Iterable[str]
+            Values that are ignored when comparing the content.
+
+        Returns
+        ------------
+        bool
+            True if the page was written, False if it was unchanged.
+        '''
+        return self._write(path, content.encode("utf-8"), self.content_hash(content, volatile))
+
+    def write_bytes(self, path:str, content:bytes) -> bool:
+        '''Writes binary content like `write`, if it has changed since the last write.'''
+        return self._write(path, content, hashlib.blake2b(content, digest_size=16).hexdigest())
+
+    def append(self, path:str, content:bytes) -> None:
+        '''Appends to a file, the next `write` of the file is never skipped.'''
+        with open(path, "ab") as file:
+            file.write(content)
+        self._hashes.pop(path, None)
+
+    def _write(self, path:str, content:bytes, digest:str) -> bool:
+        '''Replaces the file atomically unless it was last written with the same digest.'''
+        if self._hashes.get(path) == digest and os.path.exists(path):
+            return False
+
+        directory, name = os.path.split(path)
+        temp_path = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as file:
+                file.write(content)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._hashes[path] = digest
+        return True
@@ -0,0 +1,224 @@
+'''
+Refresh pipeline of the monitor.
+Watching the file, parsing it and rendering the pages run as stages on their own threads,
+connected by queues that hold only the newest item. While a slow render is running, the
+file is already parsed again, and a snapshot that was replaced by a newer one before it
+was rendered is dropped, so the pages always show the latest results.
+'''
+
+import os
+import time
+import threading
+from typing import Callable
+from typing import Dict
+from typing import NamedTuple
+from src.decode_methods import CockpitXPTailParser
+from src.renderer import PageDependencies, prepare_page, write_page
+from src.watcher import FileWatcher
+from src.metrics import Metrics
+
+class FileChange(NamedTuple):
+    '''A change of the results file reported by the watch stage.'''
+    mtime: float
+    finish: bool
+    initial: bool = False
+
+
+class PageSnapshot(NamedTuple):
+    '''The template data of the changed pages, produced by the parse stage.'''
+    mtime: float
+    pages: Dict[str, dict]
+
+
+class LatestQueue:
+    '''
+    Queue between two stages holding at most one item.
+    A new item replaces the waiting one, `merge` combines them, so the queue never grows
+    and a slow consumer always receives the newest state.
+    '''
+
+    def __init__(self, name:str, merge:Callable = None):
+        '''
+        Initializes an empty queue.
+
+        Parameters
+        ------------
+        name: str
+            The name of the queue, used as label of the `snapshots_dropped` metric.
+        merge: Callable, default None
+            Combines the waiting item and the new item, by default the new item is kept.
+        '''
+        self.name = name
+        self._merge = merge
+        self._condition = threading.Condition()
+        self._item = None
+        self._waiting = False
+        self._closed = False
+
+    def put(self, item) -> None:
+        '''Adds an item, replacing the item that is still waiting.'''
+        with self._condition:
+            if self._waiting:
+                Metrics.shared().increment("snapshots_dropped", queue=self.name)
+                if self._merge is not None:
+                    item = self._merge(self._item, item)
+            self._item = item
+            self._waiting = True
+            self._condition.notify()
+
+    def get(self):
+        '''Waits for an item and removes it, returns None once the queue is closed.'''
+        with self._condition:
+            while not self._waiting and not self._closed:
+                self._condition.wait()
+            if not self._waiting:
+                return None
+            item, self._item, self._waiting = self._item, None, False
+            return item
+
+    def close(self) -> None:
+        '''Closes the queue, a waiting item is still delivered.'''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def _merge_changes(older:FileChange, newer:FileChange) -> FileChange:
+    '''Combines two changes, the latency is measured from the older one.'''
+    return FileChange(min(older.mtime, newer.mtime), newer.finish,
+                      older.initial or newer.initial)
+
+def _merge_snapshots(older:PageSnapshot, newer:PageSnapshot) -> PageSnapshot:
+    '''Combines two snapshots, a page missing in the newer one keeps its older data.'''
+    return PageSnapshot(min(older.mtime, newer.mtime), {**older.pages, **newer.pages})
+
+
+class RefreshPipeline: # pylint: disable=too-many-instance-attributes
+    '''
+    Keeps the pages of a results file up to date with three stages:
+
+    watch   waits for changes of the file and reports them to the parse stage
+    parse   reads the appended results and prepares the data of the changed pages
+    render  renders the pages from the prepared data and writes them
+
+    The template data holds only plain values, so the render stage never reads the
+    championship while the parse stage changes it.
+    '''
+
+    POLL_INTERVAL = 1
+
+    def __init__(self, parser:CockpitXPTailParser, watcher:FileWatcher,
+                 metrics_path:str = None):
+        '''
+        Initializes the pipeline.
+
+        Parameters
+        ------------
+        parser: CockpitXPTailParser
+            The parser providing the championship, it is only used by the parse stage.
+        watcher: FileWatcher
+            The watcher of the results file.
+        metrics_path: str, default None
+            Optional text file the metrics are written to after every refresh.
+        '''
+        self.parser = parser
+        self.watcher = watcher
+        self.metrics_path = metrics_path
+        self._dependencies = PageDependencies()
+        self._changes = LatestQueue("changes", _merge_changes)
+        self._snapshots = LatestQueue("snapshots", _merge_snapshots)
+        self._stopped = threading.Event()
+        self._threads = [threading.Thread(target=target, name=f"refresh-{name}", daemon=True)
+                         for name, target in (("watch", self._watch), ("parse", self._parse),
+                                              ("render", self._render))]
+
+    def _file_mtime(self) -> float:
+        '''Returns the modification time of the results file, or now if it is missing.'''
+        try:
+            return os.path.getmtime(self.watcher.file_path)
+        except FileNotFoundError:
+            return time.time()
+
+    def start(self) -> None:
+        '''
+        Starts the stages. The file is read and all pages are rendered first, also if
+        the restored snapshot already holds all results.
+        '''
+        self._dependencies = PageDependencies()
+        self._changes.put(FileChange(self._file_mtime(), False, True))
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        '''Stops the stages after the current refresh and waits for them.'''
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join()
+
+    def run(self) -> None:
+        '''Runs the pipeline until it is interrupted or a stage has failed.'''
+        self.start()
+        try:
+            while all(thread.is_alive() for thread in self._threads):
+                self._threads[-1].join(self.POLL_INTERVAL)
+        finally:
+            self.stop()
+
+    def _watch(self) -> None:
+        '''
+        Watch stage: reports changes of the file and unterminated lines that are final,
+        see `CockpitXPTailParser.due_for_finish`.
+        '''
+        metrics = Metrics.shared()
+        try:
+            while not self._stopped.is_set():
+                changed = self.watcher.wait(self.POLL_INTERVAL)
+                if not changed and not self.parser.has_partial_record:
+                    continue
+                mtime = self._file_mtime()
+                if changed:
+                    metrics.observe("detect", max(0.0, time.time() - mtime))
+                elif not self.parser.due_for_finish(mtime):
+                    continue
+                self._changes.put(FileChange(mtime, not changed))
+        finally:
+            self._changes.close()
+
+    def _parse(self) -> None:
+        '''Parse stage: reads the new results and prepares the data of the changed pages.'''
+        try:
+            while not self._stopped.is_set():
+                change = self._changes.get()
+                if change is None:
+                    break
+                updated = self.parser.update(change.finish)
+                for error in self.parser.errors:
+                    print(f"Skipped malformed line: {error}")
+                if not updated and not change.initial:
+                    continue
+                if updated:
+                    print("File updated! Reading new results...")
+                championship = self.parser.championship
+                pages = {}
+                for page, key in self._dependencies.changed_pages(championship).items():
+                    pages[page] = prepare_page(page, championship)
+                    self._dependencies.rendered(page, key)
+                self._snapshots.put(PageSnapshot(change.mtime, pages))
+                self.parser.save_snapshot()
+        finally:
+            self._snapshots.close()
+
+    def _render(self) -> None:
+        '''Render stage: writes the pages of the newest snapshot and ends the refresh cycle.'''
+        metrics = Metrics.shared()
+        while True:
+            snapshot = self._snapshots.get()
+            if snapshot is None:
+                break
+            for page, data in snapshot.pages.items():
+                write_page(page, data)
+            latency = max(0.0, time.time() - snapshot.mtime)
+            metrics.set_gauge("update_to_visible_seconds", latency)
+            metrics.end_cycle(update_to_visible_ms=round(latency * 1000, 3))
+            if self.metrics_path:
+                metrics.write_prometheus(self.metrics_path)
@@ -1,7 +1,15 @@
 '''This module contains the RaceResult class and the RaceResultContainer class.'''
 
-class RaceResult:
-    '''RaceResult class stores a result of a race of a driver   '''
+class RaceResult: # pylint: disable=too-many-instance-attributes
+    '''
+    RaceResult class stores a result of a race of a driver.
+    The attributes are kept in slots, so a result has no `__dict__`.
+    '''
+    __slots__ = ("_position", "_driver", "_laps", "_time", "_car", "_best_lap_time",
+                 "_race_id", "_listeners")
+
+    FIELDS = ("position", "driver", "laps", "time", "car", "best_lap_time", "race_id")
+
     def __init__(self, result: dict[str,any]) -> None:
         self._position = result['position']
         self._driver = result['driver']
@@ -10,6 +18,79 @@ class RaceResult:
         self._car = result['car']
         self._best_lap_time = result['best_lap_time']
         self._race_id = result['id']
+        self._listeners = ()
+
+    @classmethod
+    def from_values(cls, position:int, driver:str, laps:int, time:int, car:str,
+                    best_lap_time:int, race_id:int, *,
+                    validate:bool = False) -> 'RaceResult':
+        # pylint: disable=too-many-arguments,too-many-positional-arguments
+        '''
+        Creates a RaceResult from positional values without building a dict.
+        The order of the values is given by `RaceResult.FIELDS`.
+
+        Parameters
+        ------------
+        validate: bool, default False
+            Checks the values like the property setters do.
+
+        Returns
+        ------------
+        RaceResult
+            The new RaceResult.
+        '''
+        race_result = cls.__new__(cls)
+        if validate:
+            race_result._listeners = ()
+            race_result.position = position
+            race_result.driver = driver
+            race_result.laps = laps
+            race_result.time = time
+            race_result.car = car
+            race_result.best_lap_time = best_lap_time
+            race_result.race_id = race_id
+            return race_result
+        race_result._position = position
+        race_result._driver = driver
+        race_result._laps = laps
+        race_result._time = time
+        race_result._car = car
+        race_result._best_lap_time = best_lap_time
+        race_result._race_id = race_id
+        race_result._listeners = ()
+        return race_result
+
+    @classmethod
+    def from_rows(cls, rows, validate:bool = False) -> list['RaceResult']:
+        '''
+        Creates RaceResults from an iterable of tuples ordered like `RaceResult.FIELDS`.
+
+        Parameters
+        ------------
+        rows: Iterable[tuple]
+            The values of the results.
+        validate: bool, default False
+            Checks the values like the property setters do.
+
+        Returns
+        ------------
+        list
+            List of the new RaceResult objects.
+        '''
+        from_values = cls.from_values
+        return [from_values(*row, validate=validate) for row in rows]
+
+    def add_listener(self, listener) -> None:
+        '''
+        Registers an object to be informed when a value of the result changes.
+        The listener has to provide a method `race_result_changed(race_result)`.
+        '''
+        self._listeners += (listener,)
+
+    def _notify(self) -> None:
+        '''Informs all listeners about a changed value.'''
+        for listener in self._listeners:
+            listener.race_result_changed(self)
 
     @property
     def position(self):
@@ -21,6 +102,7 @@ class RaceResult:
         if value < 1:
             raise ValueError("Position must be at least 1")
         self._position = value
+        self._notify()
 
     @property
     def driver(self):
@@ -32,6 +114,7 @@ class RaceResult:
         if not isinstance(value, str):
             raise ValueError("Driver name must be a string")
         self._driver = value
+        self._notify()
 
     @property
     def laps(self):
@@ -43,6 +126,7 @@ class RaceResult:
         if value < 0:
             raise ValueError("Laps cannot be negative")
         self._laps = value
+        self._notify()
 
     @property
     def time(self):
@@ -54,6 +138,7 @@ class RaceResult:
         if value < 0:
             raise ValueError("Time cannot be negative")
         self._time = value
+        self._notify()
 
     @property
     def car(self):
@@ -65,6 +150,7 @@ class RaceResult:
         if not isinstance(value, str):
             raise ValueError("Car name must be a string")
         self._car = value
+        self._notify()
 
     @property
     def best_lap_time(self):
@@ -76,6 +162,7 @@ class RaceResult:
         if value < 0:
             raise ValueError("Best lap time cannot be negative")
         self._best_lap_time = value
+        self._notify()
 
     @property
     def race_id(self):
@@ -87,6 +174,7 @@ class RaceResult:
         if value < 0:
             raise ValueError("Race number cannot be negative")
         self._race_id = value
+        self._notify()
 
     def __str__(self):
         return (f"Race(Position: {self.position}, Driver: {self.driver}, Laps: {self.laps}, "
@@ -5,11 +5,67 @@ It takes a `Championship` object as input and generates an HTML
 file with the results of the championship.
 '''
 
+import os
 import datetime
-from datetime import timedelta
-from itertools import count
-from jinja2 import Environment, FileSystemLoader
+from typing import Dict
+from typing import List
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
 from src.championship import Championship
+from src.output import PageWriter
+from src.feed import StandingsFeed
+from src.metrics import Metrics
+from src.gaps import format_laps, format_time, format_times, gaps
+from src.telemetry import HeatTelemetry, LaneTiming
+
+# Number of drivers of the championship ranking compared on the head-to-head page
+HEAD_TO_HEAD_DRIVERS = 10
+
+class PageRenderer:
+    '''
+    Holds one Jinja environment for all pages.
+    All templates are compiled once and kept in memory, a template is only compiled
+    again when its file has changed. With a cache directory the compiled bytecode is
+    stored on disk, so a restart loads the templates without compiling them.
+    '''
+
+    _shared : 'PageRenderer' = None
+
+    def __init__(self, template_dir:str = "templates", cache_dir:str = None):
+        '''
+        Initializes the environment and compiles all templates.
+
+        Parameters
+        ------------
+        template_dir: str, default "templates"
+            The directory containing the templates.
+        cache_dir: str, default None
+            Optional directory for the bytecode cache.
+        '''
+        bytecode_cache = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        self.env = Environment(loader=FileSystemLoader(template_dir),
+                               bytecode_cache=bytecode_cache,
+                               auto_reload=True, cache_size=-1)
+        for name in self.env.list_templates(extensions=["html"]):
+            self.env.get_template(name)
+
+    def get_template(self, name:str) -> Template:
+        '''Returns the compiled template, recompiles it if the file has changed.'''
+        return self.env.get_template(name)
+
+    @classmethod
+    def shared(cls) -> 'PageRenderer':
+        '''Returns the renderer shared by all pages, it is created on first use.'''
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def set_shared(cls, renderer:'PageRenderer') -> None:
+        '''Replaces the shared renderer, e.g. by one with a bytecode cache.'''
+        cls._shared = renderer
 
 def milliseconds_to_time(milliseconds:int) -> str:
     '''
@@ -25,12 +81,9 @@ def milliseconds_to_time(milliseconds:int) -> str:
     str
         The formatted time string in the format "mm:ss:fff".
     '''
-    time = timedelta(milliseconds=milliseconds)
-    minutes, seconds = divmod(time.total_seconds(), 60)
-    millis = int(milliseconds % 1000)
-    return f"{int(minutes)}:{int(seconds):02}.{millis:03}"
+    return format_time(milliseconds)
 
-def generate_sprint_ranking_page(championship: Championship) -> None:
+def sprint_ranking_data(championship: Championship) -> dict:
     '''
     Compares the results of multiple drivers in the championship.
     
@@ -38,195 +91,470 @@ def generate_sprint_ranking_page(championship: Championship) -> None:
     ------------
     championship: Championship
         The championship object containing the drivers and their results.
+
+    Returns
+    ------------
+    dict
+        The data for the sprint ranking template.
     '''
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("sprint_ranking.html")
     result = championship.get_driver_result()
-    fastest_lap = min(res.fastest_lap for res in result)
+    best = [res.best_grand_prix for res in result]
+    lap_times = [res.fastest_lap for res in result]
+    times = format_times([res.time for res in best])
+    formatted_laps = format_times(lap_times)
 
-    counter = count(1)
     data = {
         "championship_name": championship.name,
         "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "fastest_lap": milliseconds_to_time(fastest_lap),
+        "fastest_lap": format_time(min(lap_times)) if lap_times else "",
         "results": [
             {
-                "position": next(counter),
+                "position": position,
                 "name": res.name,
-                "laps": res.best_grand_prix.laps,
-                "time": milliseconds_to_time(res.best_grand_prix.time),
-                "car": res.best_grand_prix.car,
-                "lap_time": milliseconds_to_time(res.fastest_lap),
-                "best_placement": res.best_grand_prix.position,
+                "laps": best_grand_prix.laps,
+                "time": time,
+                "car": best_grand_prix.car,
+                "lap_time": lap_time,
+                "best_placement": best_grand_prix.position,
                 "num_grand_prix": res.number_of_grands_prix,
-                "best_grand_prix": res.best_grand_prix.race_id,
+                "best_grand_prix": best_grand_prix.race_id,
             }
-            for res in result
+            for position, (res, best_grand_prix, time, lap_time)
+            in enumerate(zip(result, best, times, formatted_laps), 1)
         ],
     }
 
-    output_html = template.render(data)
-    with open("output/championship_sprint_ranking.html", "w", encoding="utf-8") as file:
-        file.write(output_html)
+    return data
+
+def championship_data(championship: Championship) -> dict:
+    '''Returns the data for the results page of the championship'''
+    drivers = championship.driver_standings("total")
+    laps = [driver.total_laps for driver in drivers]
+    total_times = [driver.total_time for driver in drivers]
+    lap_times = [driver.fastest_lap for driver in drivers]
+    gap, person_in_front = gaps(total_times, laps)
 
-def generate_championship_page(championship: Championship) -> None:
-    '''Generates the results page for the championship'''
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("championship_ranking.html")
-
-    _driver_prep = championship.get_driver_result(lambda d: (-d.total_laps, d.total_time))
-    _idx = 0
-    _driver = []
-    for driver in _driver_prep:
-        _gap = ''
-        _person_int_front = ''
-        if 0 < _idx:
-            # gap to leader
-            if driver.total_laps == _driver_prep[0].total_laps:
-                _gap = milliseconds_to_time(driver.total_time - _driver_prep[0].total_time)
-            else:
-                if _driver_prep[0].total_laps - driver.total_laps == 1:
-                    _gap = '1 Lap'
-                else:
-                    _gap = f'{_driver_prep[0].total_laps-driver.total_laps} Laps'
-
-            # gap to person in front
-            if driver.total_laps == _driver_prep[_idx-1].total_laps:
-                _person_int_front = milliseconds_to_time(driver.total_time -
-                                                         _driver_prep[_idx-1].total_time)
-            else:
-                if _driver_prep[_idx-1].total_laps - driver.total_laps == 1:
-                    _person_int_front = '1 Lap'
-                else:
-                    _person_int_front = f'{_driver_prep[_idx-1].total_laps-driver.total_laps} Laps'
-
-        _driver.append((_gap, _person_int_front, driver))
-        _idx += 1
-
-    fastest_lap = min(drv.fastest_lap for drv in _driver_prep)
-    counter = count(1)
     data = {
         "championship_name": championship.name,
         "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "fastest_lap": milliseconds_to_time(fastest_lap),
+        "fastest_lap": format_time(min(lap_times)) if lap_times else "",
         "results": [
             {
-                "position": next(counter),
-                "name": res.name,
-                "laps": res.total_laps,
-                "time": milliseconds_to_time(res.total_time),
-                "gap": gap,
-                "person_in_front": person_in_front,
-                "lap_time": milliseconds_to_time(res.fastest_lap),
+                "position": position,
+                "name": driver.name,
+                "laps": driver_laps,
+                "time": time,
+                "gap": driver_gap,
+                "person_in_front": interval,
+                "lap_time": lap_time,
             }
-            for (gap,person_in_front,res) in _driver
+            for position, (driver, driver_laps, time, driver_gap, interval, lap_time)
+            in enumerate(zip(drivers, laps, format_times(total_times), gap, person_in_front,
+                             format_times(lap_times)), 1)
         ],
     }
 
-    output_html = template.render(data)
-    with open("output/race_results.html", "w", encoding="utf-8") as file:
-        file.write(output_html)
+    return data
 
-def generate_fastest_lap_page(championship: Championship) -> None:
+def fastest_lap_data(championship: Championship) -> dict:
     '''
-    Generates the fastest lap page for the championship.
+    Returns the data for the fastest lap page of the championship.
     '''
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("fastest_lap.html")
+    drivers = championship.driver_standings("fastest")
+    lap_times = [driver.fastest_lap for driver in drivers]
+    gap, person_in_front = gaps(lap_times)
 
-    _driver_prep = championship.get_driver_result(lambda d: (d.fastest_lap))
-    _idx = 0
-    _driver = []
-    for driver in _driver_prep:
-        _gap = ''
-        _person_int_front = ''
-        if 0 < _idx:
-            # gap to leader
-            _gap = milliseconds_to_time(driver.fastest_lap - _driver_prep[0].fastest_lap)
+    data = {
+        "championship_name": championship.name,
+        "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "results": [
+            {
+                "position": position,
+                "name": driver.name,
+                "lap_time": lap_time,
+                "automotive": driver.fastest_lap_race_result.car,
+                "gap": driver_gap,
+                "person_in_front": interval # interval is gap between 2 drivers
+            }
+            for position, (driver, lap_time, driver_gap, interval)
+            in enumerate(zip(drivers, format_times(lap_times), gap, person_in_front), 1)
+        ],
+    }
 
-            # gap to person in front
-            _person_int_front = milliseconds_to_time(driver.fastest_lap -
-                                                         _driver_prep[_idx-1].fastest_lap)
+    return data
 
-        _driver.append((_gap, _person_int_front, driver))
-        _idx += 1
+def grand_prix_data(championship: Championship) -> dict:
+    '''Returns the data for the results page of the last grand prix'''
+    race_results = championship.get_driver_result_last_grand_prix()
+    laps = [res.laps for res in race_results]
+    times = [res.time for res in race_results]
+    lap_times = [res.best_lap_time for res in race_results]
+    gap, person_in_front = gaps(times, laps)
 
-    counter = count(1)
     data = {
         "championship_name": championship.name,
         "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "fastest_lap": format_time(min(lap_times)) if lap_times else "",
         "results": [
             {
-                "position": next(counter),
-                "name": res.name,
-                "lap_time": milliseconds_to_time(res.fastest_lap),
-                "automotive": res.fastest_lap_race_result.car,
-                "gap": gap,
-                "person_in_front": person_in_front # interval is gap between 2 drivers
+                "position": position,
+                "name": res.driver,
+                "laps": result_laps,
+                "time": time,
+                "car": res.car,
+                "gap": result_gap,
+                "person_in_front": interval,
+                "lap_time": lap_time,
             }
-            for (gap,person_in_front,res) in _driver
+            for position, (res, result_laps, time, result_gap, interval, lap_time)
+            in enumerate(zip(race_results, laps, format_times(times), gap, person_in_front,
+                             format_times(lap_times)), 1)
         ],
     }
 
-    output_html = template.render(data)
-    with open("output/fastest_lap.html", "w", encoding="utf-8") as file:
-        file.write(output_html)
+    return data
+
+def car_statistics_data(championship: Championship) -> dict:
+    '''Returns the data for the statistics page of the car models.'''
+    cars = championship.car_statistics()
+    lap_times = [car.fastest_lap_result.best_lap_time for car in cars]
 
-def generate_grand_prix_page(championship: Championship) -> None:
-    '''Generates the results page for the championship'''
-    env = Environment(loader=FileSystemLoader("templates"))
-    template = env.get_template("grand_prix.html")
-
-    _race_result_prep = championship.get_driver_result_last_grand_prix()
-    _idx = 0
-    _race_result = []
-    for _result in _race_result_prep:
-        _gap = ''
-        _person_int_front = ''
-        if 0 < _idx:
-            # gap to leader
-            if _result.laps == _race_result_prep[0].laps:
-                _gap = milliseconds_to_time(_result.time - _race_result_prep[0].time)
-            else:
-                if _race_result_prep[0].laps - _result.laps == 1:
-                    _gap = '1 Lap'
-                else:
-                    _gap = f'{_race_result_prep[0].laps-_result.laps} Laps'
-
-            # gap to person in front
-            if _result.laps == _race_result_prep[_idx-1].laps:
-                _person_int_front = milliseconds_to_time(_result.time -
-                                                         _race_result_prep[_idx-1].time)
-            else:
-                if _race_result_prep[_idx-1].laps - _result.laps == 1:
-                    _person_int_front = '1 Lap'
-                else:
-                    _person_int_front = f'{_race_result_prep[_idx-1].laps-_result.laps} Laps'
-
-        _race_result.append((_gap, _person_int_front, _result))
-        _idx += 1
-
-    fastest_lap = min(res.best_lap_time for res in _race_result_prep)
-    counter = count(1)
     data = {
         "championship_name": championship.name,
         "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "fastest_lap": milliseconds_to_time(fastest_lap),
+        "fastest_lap": format_time(min(lap_times)) if lap_times else "",
         "results": [
             {
-                "position": next(counter),
-                "name": res.driver,
-                "laps": res.laps,
-                "time": milliseconds_to_time(res.time),
-                "car": res.car,
-                "gap": gap,
-                "person_in_front": person_in_front,
-                "lap_time": milliseconds_to_time(res.best_lap_time),
+                "position": position,
+                "car": car.car,
+                "results": car.results,
+                "drivers": len(car.drivers),
+                "name": car.best_result.driver,
+                "laps": car.best_result.laps,
+                "time": time,
+                "lap_time": lap_time,
+                "lap_time_driver": car.fastest_lap_result.driver,
             }
-            for (gap,person_in_front,res) in _race_result
+            for position, (car, time, lap_time)
+            in enumerate(zip(cars, format_times([car.best_result.time for car in cars]),
+                             format_times(lap_times)), 1)
         ],
     }
 
-    output_html = template.render(data)
-    with open("output/grand_prix.html", "w", encoding="utf-8") as file:
-        file.write(output_html)
+    return data
+
+def head_to_head_data(championship: Championship) -> dict:
+    '''
+    Returns the data for the head-to-head page, the records of every pair of the
+    drivers in the top ten of the championship.
+    '''
+    drivers = championship.driver_standings("total", HEAD_TO_HEAD_DRIVERS)
+    results = []
+    for index, driver in enumerate(drivers):
+        for opponent in drivers[index + 1:]:
+            record = championship.head_to_head(driver.name, opponent.name)
+            if not record.meetings:
+                continue
+            last_meeting = championship.get_grand_prix_by_id(record.last_meeting)
+            results.append({
+                "position": len(results) + 1,
+                "name": driver.name,
+                "opponent": opponent.name,
+                "meetings": record.meetings,
+                "won": record.won,
+                "lost": record.lost,
+                "last_meeting": last_meeting.name if last_meeting else "",
+            })
+
+    data = {
+        "championship_name": championship.name,
+        "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+
+    return data
+
+def heat_data(heat: HeatTelemetry, championship_name: str) -> dict:
+    '''
+    Returns the data for the live page of the running heat.
+    The gaps are measured at the last crossing of each lane against the crossings of the
+    cars in front on the same lap, a car whose crossing is no longer buffered is shown
+    laps behind.
+    '''
+    lanes = heat.standings()
+    results = []
+    for position, lane in enumerate(lanes, 1):
+        ahead = position > 1 and lane.laps
+        results.append({
+            "position": position,
+            "lane": lane.lane,
+            "name": lane.driver,
+            "automotive": lane.car,
+            "laps": lane.laps,
+            "lap_time": format_time(lane.best_lap) if lane.best_lap else "",
+            "gap": _heat_gap(lane, lanes[0]) if ahead else "",
+            "person_in_front": _heat_gap(lane, lanes[position - 2]) if ahead else "",
+        })
+
+    data = {
+        "championship_name": championship_name,
+        "last_update": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "fastest_lap": format_time(heat.fastest_lap) if heat.fastest_lap else "",
+        "results": results,
+    }
+
+    return data
+
+def _heat_gap(lane: LaneTiming, front: LaneTiming) -> str:
+    '''Formats the time a lane is behind a car in front, in laps if it is not buffered.'''
+    crossing = front.crossing_time(lane.laps)
+    if crossing < 0:
+        return format_laps(front.laps - lane.laps)
+    return format_time(lane.last_crossing - crossing)
+
+# Template of the live heat page, it is rendered from a `HeatTelemetry` instead of the championship
+HEAT_TEMPLATE = "heat.html"
+
+# Page name -> (template, output file, function building the template data)
+PAGES = {
+    "championship": ("championship_ranking.html", "output/race_results.html",
+                     championship_data),
+    "sprint_ranking": ("sprint_ranking.html", "output/championship_sprint_ranking.html",
+                       sprint_ranking_data),
+    "fastest_lap": ("fastest_lap.html", "output/fastest_lap.html", fastest_lap_data),
+    "grand_prix": ("grand_prix.html", "output/grand_prix.html", grand_prix_data),
+    "car_statistics": ("car_statistics.html", "output/car_statistics.html",
+                       car_statistics_data),
+    "head_to_head": ("head_to_head.html", "output/head_to_head.html", head_to_head_data),
+}
+
+# Page name -> views of the championship shown on the page, see `Championship.VIEWS`
+PAGE_VIEWS = {
+    "championship": ("totals", "fastest"),
+    "sprint_ranking": ("best", "totals", "fastest"),
+    "fastest_lap": ("fastest",),
+    "grand_prix": ("last_grand_prix",),
+    "car_statistics": ("totals",),
+    "head_to_head": ("totals",),
+}
+
+class PageDependencies:
+    '''
+    Remembers the view versions every page was rendered from.
+    A page has to be rendered again if one of its views in `PAGE_VIEWS` has a new version,
+    or if it was rendered from another championship, e.g. after the file was parsed again.
+    '''
+
+    def __init__(self):
+        self._championship : Championship = None
+        self._rendered : Dict[str, tuple] = {}
+
+    def changed_pages(self, championship: Championship) -> Dict[str, tuple]:
+        '''
+        Returns the pages whose views changed since they were rendered.
+
+        Parameters
+        ------------
+        championship: Championship
+            The championship the pages are rendered from.
+
+        Returns
+        ------------
+        dict
+            Page name -> versions of its views, to be passed to `rendered`.
+        '''
+        if championship is not self._championship:
+            self._championship = championship
+            self._rendered.clear()
+        versions = championship.view_versions()
+        changed = {}
+        for page, views in PAGE_VIEWS.items():
+            key = tuple(versions[view] for view in views)
+            if self._rendered.get(page) != key:
+                changed[page] = key
+        return changed
+
+    def rendered(self, page: str, key: tuple) -> None:
+        '''Records that a page was rendered from the view versions returned by `changed_pages`.'''
+        self._rendered[page] = key
+
+def prepare_page(page: str, championship: Championship) -> dict:
+    '''
+    Builds the template data of a page.
+    The data holds only plain values, it can be rendered while the championship changes.
+
+    Parameters
+    ------------
+    page: str
+        The name of the page, a key of `PAGES`.
+    championship: Championship
+        The championship object containing the drivers and their results.
+
+    Returns
+    ------------
+    dict
+        The template data.
+    '''
+    with Metrics.shared().stage("prepare", page=page):
+        return PAGES[page][2](championship)
+
+def render_data(page: str, data: dict, **context) -> str:
+    '''Renders a page from the template data returned by `prepare_page`.'''
+    with Metrics.shared().stage("render", page=page):
+        return PageRenderer.shared().get_template(PAGES[page][0]).render(data, **context)
+
+def render_page(page: str, championship: Championship, **context) -> tuple[dict, str]:
+    '''
+    Renders a page in memory.
+
+    Parameters
+    ------------
+    page: str
+        The name of the page, a key of `PAGES`.
+    championship: Championship
+        The championship object containing the drivers and their results.
+    context:
+        Additional template variables, e.g. `live_events` for the live results server.
+
+    Returns
+    ------------
+    tuple
+        The template data and the rendered HTML.
+    '''
+    data = prepare_page(page, championship)
+    return data, render_data(page, data, **context)
+
+def render_rows(page: str, data: dict) -> list[str]:
+    '''
+    Renders every result row of a page on its own, as used for row-level updates.
+
+    Parameters
+    ------------
+    page: str
+        The name of the page, a key of `PAGES`.
+    data: dict
+        The template data returned by `render_page`.
+
+    Returns
+    ------------
+    list
+        The HTML of each table row.
+    '''
+    return _template_rows(PAGES[page][0], data)
+
+def _template_rows(template: str, data: dict) -> list[str]:
+    '''Renders the result rows with the `row` macro of a template.'''
+    row = PageRenderer.shared().get_template(template).module.row
+    return [str(row(result, data.get("fastest_lap"))).strip() for result in data["results"]]
+
+def render_heat(data: dict, **context) -> tuple[str, list[str]]:
+    '''
+    Renders the live page of a heat in memory.
+
+    Parameters
+    ------------
+    data: dict
+        The template data returned by `heat_data`.
+    context:
+        Additional template variables, e.g. `live_events` for the live results server.
+
+    Returns
+    ------------
+    tuple
+        The rendered HTML and the HTML of each table row.
+    '''
+    with Metrics.shared().stage("render", page="heat"):
+        html = PageRenderer.shared().get_template(HEAT_TEMPLATE).render(data, **context)
+        return html, _template_rows(HEAT_TEMPLATE, data)
+
+def page_path(page: str, output_dir: str = None) -> str:
+    '''Returns the output file of a page, optionally in another directory than `output`.'''
+    if output_dir is None:
+        return PAGES[page][1]
+    return os.path.join(output_dir, os.path.basename(PAGES[page][1]))
+
+def write_page(page: str, data: dict, output_dir: str = None) -> bool:
+    '''
+    Renders a page from its template data and writes it to its output file.
+    The data is also published to the standings feed next to the page, see `src.feed`.
+
+    Parameters
+    ------------
+    page: str
+        The name of the page, a key of `PAGES`.
+    data: dict
+        The template data returned by `prepare_page`.
+    output_dir: str, default None
+        Optional directory the page is written to instead of `output`.
+
+    Returns
+    ------------
+    bool
+        True if the file was written, False if its content was unchanged.
+    '''
+    output_html = render_data(page, data)
+    metrics = Metrics.shared()
+    with metrics.stage("write", page=page):
+        written = PageWriter.shared().write(page_path(page, output_dir), output_html,
+                                            volatile=(data["last_update"],))
+    metrics.increment("pages_written" if written else "pages_unchanged", page=page)
+    with metrics.stage("feed", page=page):
+        StandingsFeed.shared().publish(page, data, os.path.dirname(page_path(page, output_dir)))
+    return written
+
+def _generate_page(page: str, championship: Championship) -> None:
+    '''Renders a page and writes it to its output file.'''
+    write_page(page, prepare_page(page, championship))
+
+def generate_changed_pages(championship: Championship, dependencies: PageDependencies,
+                           output_dir: str = None) -> List[str]:
+    '''
+    Generates only the pages whose views changed since they were generated last.
+
+    Parameters
+    ------------
+    championship: Championship
+        The championship object containing the drivers and their results.
+    dependencies: PageDependencies
+        The view versions of the pages generated before, it is updated.
+    output_dir: str, default None
+        Optional directory the pages are written to instead of `output`.
+
+    Returns
+    ------------
+    list
+        The names of the generated pages.
+    '''
+    changed = dependencies.changed_pages(championship)
+    metrics = Metrics.shared()
+    for page in PAGES:
+        if page not in changed:
+            metrics.increment("pages_skipped", page=page)
+            continue
+        write_page(page, prepare_page(page, championship), output_dir)
+        dependencies.rendered(page, changed[page])
+    return list(changed)
+
+def generate_sprint_ranking_page(championship: Championship) -> None:
+    '''Generates the sprint ranking page with the best grand prix of every driver.'''
+    _generate_page("sprint_ranking", championship)
+
+def generate_championship_page(championship: Championship) -> None:
+    '''Generates the results page for the championship'''
+    _generate_page("championship", championship)
+
+def generate_fastest_lap_page(championship: Championship) -> None:
+    '''Generates the fastest lap page for the championship.'''
+    _generate_page("fastest_lap", championship)
+
+def generate_grand_prix_page(championship: Championship) -> None:
+    '''Generates the results page of the last grand prix.'''
+    _generate_page("grand_prix", championship)
+
+def generate_car_statistics_page(championship: Championship) -> None:
+    '''Generates the statistics page of the car models.'''
+    _generate_page("car_statistics", championship)
+
+def generate_head_to_head_page(championship: Championship) -> None:
+    '''Generates the head-to-head page of the leading drivers.'''
+    _generate_page("head_to_head", championship)
@@ -0,0 +1,331 @@
+'''
+Asyncio live results server.
+Serves the pages from rendered copies in memory and pushes row-level changes
+to the connected browsers with server-sent events. No outside services are needed.
+'''
+
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import Dict
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Set
+from src.decode_methods import CockpitXPTailParser
+from src.renderer import PAGES, PageDependencies, render_page, render_rows
+from src.renderer import heat_data, render_heat
+from src.telemetry import HeatTelemetry
+from src.watcher import FileWatcher
+from src.metrics import Metrics
+from src.feed import StandingsFeed
+
+class RenderedPage(NamedTuple):
+    '''A page rendered in memory with its rows for the deltas.'''
+    html: bytes
+    rows: List[str]
+    last_update: str
+
+
+class LiveResultsServer: # pylint: disable=too-many-instance-attributes
+    '''
+    HTTP server for the result pages.
+    `GET /<page>` returns the page, `GET /events/<page>` is an event stream sending
+    the rows that changed since the previous update. A new stream starts with all rows,
+    so a browser that reconnects is consistent again. `GET /metrics` returns the
+    pipeline metrics in the Prometheus text format. `GET /feed/<page>.json` and
+    `/feed/<page>.bin` return the standings feed of a page, `/feed/<page>.delta.json` and
+    `/feed/<page>.delta.bin` its last delta, see `src.feed`. With lap crossing events,
+    `GET /heat` shows the positions of the running heat, see `follow_heat`.
+    '''
+
+    STATIC_TYPES = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png",
+                    ".css": "text/css", ".ico": "image/x-icon"}
+    CLIENT_QUEUE_SIZE = 16
+    HEARTBEAT = 15
+
+    def __init__(self, parser:CockpitXPTailParser, watcher:FileWatcher,
+                 static_dir:str = "output", metrics_path:str = None):
+        '''
+        Initializes the server.
+
+        Parameters
+        ------------
+        parser: CockpitXPTailParser
+            The parser providing the championship.
+        watcher: FileWatcher
+            The watcher of the results file.
+        static_dir: str, default "output"
+            Directory with the images referenced by the pages.
+        metrics_path: str, default None
+            Optional text file the metrics are written to after every refresh.
+        '''
+        self.parser = parser
+        self.watcher = watcher
+        self.static_dir = static_dir
+        self.metrics_path = metrics_path
+        self._pages : Dict[str, RenderedPage] = {}
+        self._sequence = 0
+        self._dependencies = PageDependencies()
+        self._feed = StandingsFeed()
+        self._feed_files : Dict[str, bytes] = {}
+        self._clients : Dict[str, Set[asyncio.Queue]] = {page: set() for page in PAGES}
+
+    def refresh(self) -> Dict[str, str]:
+        '''
+        Renders the pages whose results changed and returns the delta message of each
+        changed page.
+
+        Returns
+        ------------
+        dict
+            Page name -> JSON message with the changed rows.
+        '''
+        championship = self.parser.championship
+        messages = {}
+        self._sequence += 1
+        for page, key in self._dependencies.changed_pages(championship).items():
+            data, html = render_page(page, championship, live_events=f"/events/{page}")
+            self._dependencies.rendered(page, key)
+            update = self._feed.update(page, data)
+            if update is not None:
+                self._feed_files.update({
+                    f"{page}.json": update.full.to_json(),
+                    f"{page}.bin": update.full.to_binary(),
+                    f"{page}.delta.json": update.delta.to_json(),
+                    f"{page}.delta.bin": update.delta.to_binary(),
+                })
+            message = self._update_page(page, data, html, render_rows(page, data))
+            if message is not None:
+                messages[page] = message
+        return messages
+
+    def refresh_heat(self, heat:HeatTelemetry) -> Dict[str, str]:
+        '''
+        Renders the page of the running heat and returns its delta message.
+
+        Returns
+        ------------
+        dict
+            "heat" -> JSON message with the changed rows, empty if no row changed.
+        '''
+        self._sequence += 1
+        data = heat_data(heat, self.parser.championship.name)
+        html, rows = render_heat(data, live_events="/events/heat")
+        message = self._update_page("heat", data, html, rows)
+        return {"heat": message} if message is not None else {}
+
+    def _update_page(self, page:str, data:dict, html:str, rows:List[str]) -> str:
+        '''Stores a rendered page and returns the message with its changed rows, or None.'''
+        old_rows = self._pages[page].rows if page in self._pages else []
+        changed = [(i, row) for i, row in enumerate(rows)
+                   if i >= len(old_rows) or old_rows[i] != row]
+        self._pages[page] = RenderedPage(html.encode("utf-8"), rows, data["last_update"])
+        if changed or len(rows) != len(old_rows):
+            return self._message(page, changed)
+        return None
+
+    def _message(self, page:str, rows:list) -> str:
+        '''Encodes a delta message of a page.'''
+        return json.dumps({"page": page, "seq": self._sequence, "rows": rows,
+                           "length": len(self._pages[page].rows),
+                           "last_update": self._pages[page].last_update},
+                          separators=(",", ":"))
+
+    def broadcast(self, messages:Dict[str, str]) -> None:
+        '''Queues the messages for all clients, slow clients are disconnected.'''
+        for page, message in messages.items():
+            for queue in list(self._clients[page]):
+                try:
+                    queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    self._clients[page].discard(queue)
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(None)
+
+    def _read_changes(self) -> float:
+        '''
+        Waits for a change of the file and reads the new results.
+        An unterminated last line is read when it is final, see
+        `CockpitXPTailParser.due_for_finish`.
+        Returns the modification time of the file if the results changed, otherwise None.
+        '''
+        changed = self.watcher.wait(timeout=1)
+        if not changed and not self.parser.has_partial_record:
+            return None
+        try:
+            mtime = os.path.getmtime(self.watcher.file_path)
+        except FileNotFoundError:
+            mtime = time.time()
+        if changed:
+            Metrics.shared().observe("detect", max(0.0, time.time() - mtime))
+        elif not self.parser.due_for_finish(mtime):
+            return None
+        updated = self.parser.update(finish=not changed)
+        for error in self.parser.errors:
+            print(f"Skipped malformed line: {error}")
+        return mtime if updated else None
+
+    async def watch(self) -> None:
+        '''Reads the results file on every change and pushes the deltas.'''
+        metrics = Metrics.shared()
+        while True:
+            mtime = await asyncio.to_thread(self._read_changes)
+            if mtime is None:
+                continue
+            print("File updated! Reading new results...")
+            messages = self.refresh()
+            with metrics.stage("push"):
+                self.broadcast(messages)
+            latency = max(0.0, time.time() - mtime)
+            metrics.set_gauge("update_to_visible_seconds", latency)
+            metrics.end_cycle(update_to_visible_ms=round(latency * 1000, 3))
+            if self.metrics_path:
+                metrics.write_prometheus(self.metrics_path)
+            await asyncio.to_thread(self.parser.save_snapshot)
+
+    async def follow_heat(self, heat:HeatTelemetry, lines:Iterator[bytes]) -> None:
+        '''
+        Feeds the lap crossing events to the heat and pushes the heat page after every
+        event. The lines are read on a daemon thread, so a blocking source such as a UDP
+        socket does not delay the results or the shutdown, the heat is only updated on
+        the event loop. Events that arrived together are pushed as one update.
+        The results file stays the source of the championship, a finished heat is not
+        added to it, the next `start` event begins a new heat.
+
+        Parameters
+        ------------
+        heat: HeatTelemetry
+            The heat shown on the page.
+        lines: Iterator[bytes]
+            The event lines, see `src.telemetry`.
+        '''
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def read() -> None:
+            try:
+                for line in lines:
+                    loop.call_soon_threadsafe(events.put_nowait, line)
+                loop.call_soon_threadsafe(events.put_nowait, None)
+            except RuntimeError:
+                pass # the event loop was closed
+
+        self._clients.setdefault("heat", set())
+        if "heat" not in self._pages:
+            self.broadcast(self.refresh_heat(heat))
+        threading.Thread(target=read, name="telemetry", daemon=True).start()
+        line = b""
+        while line is not None:
+            line = await events.get()
+            while line is not None:
+                try:
+                    heat.feed_line(line)
+                except ValueError as error:
+                    print(f"Skipped telemetry event: {error}")
+                if events.empty():
+                    break
+                line = events.get_nowait()
+            self.broadcast(self.refresh_heat(heat))
+
+    async def handle(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> None:
+        '''Answers a single HTTP request.'''
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            method, path = request.split(b" ", 2)[:2]
+            path = path.decode("latin-1").split("?", 1)[0].strip("/") or "championship"
+            if method != b"GET":
+                await self._respond(writer, "405 Method Not Allowed", b"", "text/plain")
+            elif path in self._pages:
+                await self._respond(writer, "200 OK", self._pages[path].html,
+                                    "text/html; charset=utf-8")
+            elif path == "metrics":
+                await self._respond(writer, "200 OK",
+                                    Metrics.shared().prometheus_text().encode("utf-8"),
+                                    "text/plain; version=0.0.4")
+            elif path.startswith("feed/") and path[5:] in self._feed_files:
+                await self._respond(writer, "200 OK", self._feed_files[path[5:]],
+                                    "application/json" if path.endswith(".json")
+                                    else "application/octet-stream")
+            elif path.startswith("events/") and path[7:] in self._pages:
+                await self._stream(writer, path[7:])
+            else:
+                await self._static(writer, path)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError,
+                ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer:asyncio.StreamWriter, status:str, body:bytes,
+                       content_type:str) -> None:
+        '''Writes a complete response.'''
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nCache-Control: no-cache\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+
+    async def _static(self, writer:asyncio.StreamWriter, path:str) -> None:
+        '''Serves an image from the static directory.'''
+        name = os.path.basename(path)
+        content_type = self.STATIC_TYPES.get(os.path.splitext(name)[1].lower())
+        file_path = os.path.join(self.static_dir, name)
+        if name != path or not content_type or not os.path.isfile(file_path):
+            await self._respond(writer, "404 Not Found", b"", "text/plain")
+            return
+        with open(file_path, "rb") as file:
+            body = file.read()
+        await self._respond(writer, "200 OK", body, content_type)
+
+    async def _stream(self, writer:asyncio.StreamWriter, page:str) -> None:
+        '''Sends the deltas of a page as server-sent events until the client disconnects.'''
+        queue = asyncio.Queue(self.CLIENT_QUEUE_SIZE)
+        queue.put_nowait(self._message(page, list(enumerate(self._pages[page].rows))))
+        self._clients[page].add(queue)
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), self.HEARTBEAT)
+                except asyncio.TimeoutError:
+                    writer.write(b": heartbeat\n\n")
+                else:
+                    if message is None:
+                        break
+                    writer.write(f"data: {message}\n\n".encode("utf-8"))
+                await writer.drain()
+        finally:
+            self._clients[page].discard(queue)
+
+    async def serve(self, host:str = "0.0.0.0", port:int = 8000,
+                    heat:HeatTelemetry = None, lines:Iterator[bytes] = None) -> None:
+        '''
+        Renders the pages and serves them until the process is stopped.
+
+        Parameters
+        ------------
+        host: str, default "0.0.0.0"
+            The address to listen on.
+        port: int, default 8000
+            The port to listen on.
+        heat: HeatTelemetry, default None
+            Optional heat shown on the `heat` page, updated from `lines`.
+        lines: Iterator[bytes], default None
+            The lap crossing events of the heat.
+        '''
+        self.refresh()
+        Metrics.shared().end_cycle()
+        self.parser.save_snapshot()
+        tasks = [self.watch()]
+        if heat is not None:
+            self._clients["heat"] = set()
+            self.refresh_heat(heat)
+            tasks.append(self.follow_heat(heat, lines))
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving live results on http://{host}:{port}/")
+        async with server:
+            await asyncio.gather(server.serve_forever(), *tasks)
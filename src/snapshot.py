@@ -0,0 +1,205 @@
+'''
+Stores the parsed state of a results file on disk.
+After a restart the snapshot is loaded instead of parsing the whole file again,
+only the bytes appended since the snapshot was written have to be decoded.
+A snapshot is only used if the results file is the same file and still starts
+with exactly the bytes the snapshot was parsed from.
+
+The snapshot is a file of JSON lines. The first line holds the version, name and date
+of the championship, every further line the identity of the parsed file and the results
+added since the line before, so a save only appends the new results. A line that was
+not written completely is ignored.
+'''
+
+import os
+import sys
+import json
+import hashlib
+import datetime
+from typing import BinaryIO
+from typing import List
+from typing import NamedTuple
+from src.championship import GrandPrix, Championship
+from src.race import RaceResult
+from src.output import PageWriter
+
+SNAPSHOT_VERSION = 2
+_HASH_BLOCK_SIZE = 1 << 20
+
+class SnapshotPosition(NamedTuple):
+    '''How much of a championship a snapshot file holds.'''
+    size: int
+    grand_prix: int
+    results: int
+
+
+def new_prefix_hash():
+    '''Returns the hash object used for the parsed prefix of a results file.'''
+    return hashlib.blake2b(digest_size=20)
+
+def prefix_hash(reader:BinaryIO, size:int):
+    '''
+    Returns the hash object of the first bytes of a file.
+    It can be updated further with the bytes that follow.
+
+    Parameters
+    ------------
+    reader: BinaryIO
+        The file opened in binary mode.
+    size: int
+        The number of bytes to hash, counted from the start of the file.
+
+    Returns
+    ------------
+    hashlib.blake2b
+        The hash of the bytes, or None if the file is shorter than `size`.
+    '''
+    digest = new_prefix_hash()
+    reader.seek(0)
+    remaining = size
+    while remaining:
+        block = reader.read(min(remaining, _HASH_BLOCK_SIZE))
+        if not block:
+            return None
+        digest.update(block)
+        remaining -= len(block)
+    return digest
+
+def dump_results(championship:Championship, position:SnapshotPosition = None) -> list:
+    '''
+    Converts the grands prix and results of a championship to plain values.
+    The drivers are not stored, they are created again from the results in the same order.
+
+    Parameters
+    ------------
+    championship: Championship
+        The championship to be converted.
+    position: SnapshotPosition, default None
+        Only the results added after this position are converted, by default all results.
+
+    Returns
+    ------------
+    list
+        [id, name, rows] of every grand prix with new results.
+    '''
+    first, skipped = (position.grand_prix - 1, position.results) if position else (0, 0)
+    entries = []
+    for index, grand_prix in enumerate(championship.grand_prix[max(first, 0):], max(first, 0)):
+        results = grand_prix.results[skipped:] if index == first else grand_prix.results
+        if results or index != first:
+            entries.append([grand_prix.id, grand_prix.name,
+                            [[getattr(r, field) for field in RaceResult.FIELDS]
+                             for r in results]])
+    return entries
+
+def dump_championship(championship:Championship) -> dict:
+    '''Converts a championship to plain values, see `dump_results`.'''
+    return {
+        "name": championship.name,
+        "date": championship.date.isoformat(),
+        "grand_prix": dump_results(championship),
+    }
+
+def load_championship(data:dict) -> Championship:
+    '''
+    Creates a championship from the values returned by `dump_championship`.
+    Driver and car names are interned like the decoded names.
+    '''
+    championship = Championship(data["name"], datetime.datetime.fromisoformat(data["date"]))
+    intern = sys.intern
+    for grand_prix_id, name, rows in data["grand_prix"]:
+        grand_prix = GrandPrix(grand_prix_id, name, championship.date, "")
+        rows = [(position, intern(driver), laps, time, intern(car), best_lap_time, race_id)
+                for position, driver, laps, time, car, best_lap_time, race_id in rows]
+        for race_result in RaceResult.from_rows(rows):
+            grand_prix.add_race_result(race_result)
+        championship.add_result(grand_prix)
+    return championship
+
+def _json_line(value:dict) -> bytes:
+    '''Encodes a line of the snapshot file.'''
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+def write_snapshot(path:str, source:dict, championship:Championship,
+                   position:SnapshotPosition = None) -> SnapshotPosition:
+    '''
+    Saves a snapshot. The results added after `position` are appended to the file,
+    if the file does not end at `position` it is written again atomically.
+
+    Parameters
+    ------------
+    path: str
+        The path of the snapshot.
+    source: dict
+        Identity of the parsed file: device, inode, size, hash and line number.
+    championship: Championship
+        The championship parsed from the file.
+    position: SnapshotPosition, default None
+        The position returned by the previous save or by `read_snapshot`.
+
+    Returns
+    ------------
+    SnapshotPosition
+        The position after the save.
+    '''
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = None
+    writer = PageWriter.shared()
+    if position is not None and size == position.size:
+        line = _json_line({"source": source, "grand_prix": dump_results(championship, position)})
+        writer.append(path, line)
+        size += len(line)
+    else:
+        content = (_json_line({"version": SNAPSHOT_VERSION, "name": championship.name,
+                               "date": championship.date.isoformat()})
+                   + _json_line({"source": source, "grand_prix": dump_results(championship)}))
+        writer.write_bytes(path, content)
+        size = len(content)
+    last = championship.grand_prix[-1].results if championship.grand_prix else []
+    return SnapshotPosition(size, len(championship.grand_prix), len(last))
+
+def read_snapshot(path:str) -> dict:
+    '''
+    Reads a snapshot written by `write_snapshot`.
+
+    Returns
+    ------------
+    dict
+        The identity of the parsed file as "source", the championship as "championship",
+        see `load_championship`, and the SnapshotPosition of the complete lines as
+        "position". None if the snapshot is missing, unreadable or of another version.
+    '''
+    try:
+        with open(path, "rb") as file:
+            lines = file.read().split(b"\n")
+        header = json.loads(lines[0])
+    except (OSError, ValueError):
+        return None
+    if not isinstance(header, dict) or header.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    grand_prix : List[list] = []
+    source = None
+    size = len(lines[0]) + 1
+    # the part after the last line break is a line that was not written completely
+    for line in lines[1:-1]:
+        try:
+            update = json.loads(line)
+            entries = update["grand_prix"]
+        except (ValueError, TypeError, KeyError):
+            break
+        for entry in entries:
+            if grand_prix and grand_prix[-1][0] == entry[0]:
+                grand_prix[-1][2].extend(entry[2])
+            else:
+                grand_prix.append(entry)
+        source = update.get("source")
+        size += len(line) + 1
+    if source is None:
+        return None
+    championship = {"name": header.get("name"), "date": header.get("date"),
+                    "grand_prix": grand_prix}
+    position = SnapshotPosition(size, len(grand_prix), len(grand_prix[-1][2]) if grand_prix else 0)
+    return {"source": source, "championship": championship, "position": position}
@@ -0,0 +1,217 @@
+'''
+Rankings that are kept in order while results are added.
+Reading a ranking, the rank of a driver or its neighbours needs no sort,
+adding a result moves only the changed driver within each ranking.
+'''
+
+from bisect import bisect_left
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+from src.driver import Driver
+from src.race import RaceResult
+
+class RankingIndex:
+    '''
+    Keeps items sorted by a key.
+    Every item has a tiebreak value, items with equal keys are ordered by it. The position
+    of an item is found by binary search on its (key, tiebreak) entry.
+    '''
+
+    def __init__(self, key:Callable):
+        '''
+        Initializes an empty ranking.
+
+        Parameters
+        ------------
+        key: Callable
+            Returns the sort key of an item.
+        '''
+        self._key = key
+        self._entries : List[tuple] = []
+        self._items : list = []
+        self._current : Dict[int, tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> None:
+        '''Removes all items.'''
+        self._entries.clear()
+        self._items.clear()
+        self._current.clear()
+
+    def assign(self, items:list) -> None:
+        '''
+        Replaces all items with a single sort, the tiebreak of an item is its position in `items`.
+
+        Parameters
+        ------------
+        items: list
+            The items to be ranked.
+        '''
+        key = self._key
+        ranked = sorted(((key(item), tiebreak), item) for tiebreak, item in enumerate(items))
+        self._entries = [entry for entry, _ in ranked]
+        self._items = [item for _, item in ranked]
+        self._current = {id(item): entry for entry, item in ranked}
+
+    def update(self, item, tiebreak:int) -> None:
+        '''
+        Inserts an item or moves it to the position of its current key.
+
+        Parameters
+        ------------
+        item:
+            The item to be ranked.
+        tiebreak: int
+            A unique value ordering items with equal keys.
+        '''
+        entry = (self._key(item), tiebreak)
+        old_entry = self._current.get(id(item))
+        if old_entry == entry:
+            return
+        if old_entry is not None:
+            index = bisect_left(self._entries, old_entry)
+            del self._entries[index]
+            del self._items[index]
+        index = bisect_left(self._entries, entry)
+        self._entries.insert(index, entry)
+        self._items.insert(index, item)
+        self._current[id(item)] = entry
+
+    def items(self, limit:int = None) -> list:
+        '''Returns the items in ranking order, optionally only the first `limit` items.'''
+        return self._items[:limit]
+
+    def index(self, item) -> int:
+        '''Returns the zero-based position of an item, or None if it is not ranked.'''
+        entry = self._current.get(id(item))
+        if entry is None:
+            return None
+        return bisect_left(self._entries, entry)
+
+    def neighbours(self, item) -> Tuple[object, object]:
+        '''Returns the items ranked directly in front of and behind an item.'''
+        index = self.index(item)
+        if index is None:
+            return None, None
+        before = self._items[index - 1] if index > 0 else None
+        after = self._items[index + 1] if index + 1 < len(self._items) else None
+        return before, after
+
+
+class Standings: # pylint: disable=too-many-instance-attributes
+    '''
+    The driver rankings of a championship and the ranking of its last grand prix.
+    Added results are collected and applied on the next read: only the drivers with new
+    results are moved, unless most drivers changed, then the rankings are sorted once.
+    If a result is changed afterwards, the rankings are built again on the next read.
+    The versions count the changes of the views derived from the results.
+    '''
+
+    # totals: laps, time and number of grands prix of the drivers
+    # best: best grand prix of the drivers, fastest: fastest lap of the drivers
+    # last_grand_prix: results of the last grand prix
+    VIEWS = ("totals", "best", "fastest", "last_grand_prix")
+
+    ORDERS : Dict[str, Callable[[Driver], tuple]] = {
+        "best": lambda d: (-d.best_grand_prix.laps, d.best_grand_prix.time),
+        "total": lambda d: (-d.total_laps, d.total_time),
+        "fastest": lambda d: d.fastest_lap,
+    }
+
+    # Moving more than this share of the drivers one by one is slower than sorting them once.
+    REBUILD_SHARE = 0.25
+
+    def __init__(self):
+        '''Initializes empty rankings.'''
+        self.rankings = {order: RankingIndex(key) for order, key in self.ORDERS.items()}
+        self.last_grand_prix = RankingIndex(lambda r: (-r.laps, r.time))
+        self._driver_index : Dict[int, int] = {}
+        self._pending : Dict[int, Driver] = {}
+        self._pending_results : List[RaceResult] = []
+        self.valid = True
+        self.size = (0, 0)
+        self.versions : Dict[str, int] = dict.fromkeys(self.VIEWS, 0)
+
+    def add_driver(self, driver:Driver, index:int) -> None:
+        '''Registers a driver with its position in the championship, it orders equal keys.'''
+        self._driver_index[id(driver)] = index
+
+    def add(self, driver:Driver, race_result:RaceResult, last_grand_prix:bool,
+            changed:Tuple[bool, bool] = (True, True)) -> None:
+        '''
+        Records a result that was added to a driver and updates the versions of the views.
+
+        Parameters
+        ------------
+        driver: Driver
+            The driver of the result.
+        race_result: RaceResult
+            The added result.
+        last_grand_prix: bool
+            True if the result belongs to the last grand prix.
+        changed: Tuple[bool, bool], default (True, True)
+            Whether the result changed the best grand prix and the fastest lap of the
+            driver, as returned by `Driver.add_race`.
+        '''
+        self._pending[id(driver)] = driver
+        versions = self.versions
+        versions["totals"] += 1
+        best, fastest = changed
+        if best:
+            versions["best"] += 1
+        if fastest:
+            versions["fastest"] += 1
+        if last_grand_prix:
+            self._pending_results.append(race_result)
+            versions["last_grand_prix"] += 1
+
+    def new_grand_prix(self) -> None:
+        '''Empties the ranking of the last grand prix after a grand prix was added.'''
+        self.last_grand_prix.clear()
+        self._pending_results.clear()
+        self.versions["last_grand_prix"] += 1
+
+    def changed(self, *views:str) -> None:
+        '''Gives the views a new version.'''
+        for view in views:
+            self.versions[view] += 1
+
+    def race_result_changed(self, _race_result:RaceResult) -> None:
+        '''Marks the rankings as outdated after a race result was changed.'''
+        self.valid = False
+
+    def update(self, drivers:List[Driver], last_results:List[RaceResult]) -> None:
+        '''
+        Applies the added results to the rankings.
+
+        Parameters
+        ------------
+        drivers: List[Driver]
+            All drivers of the championship in the order they joined.
+        last_results: List[RaceResult]
+            The results of the last grand prix.
+        '''
+        if (not self.valid or any(i not in self._driver_index for i in self._pending)
+                or len(self._pending) > self.REBUILD_SHARE * len(drivers)):
+            self._driver_index = {id(driver): index for index, driver in enumerate(drivers)}
+            ranked = [driver for driver in drivers if driver.race_results]
+            for ranking in self.rankings.values():
+                ranking.assign(ranked)
+        else:
+            for driver in self._pending.values():
+                index = self._driver_index[id(driver)]
+                for ranking in self.rankings.values():
+                    ranking.update(driver, index)
+
+        if not self.valid or len(self._pending_results) > self.REBUILD_SHARE * len(last_results):
+            self.last_grand_prix.assign(last_results)
+        else:
+            for race_result in self._pending_results:
+                self.last_grand_prix.update(race_result, len(self.last_grand_prix))
+        self._pending.clear()
+        self._pending_results.clear()
+        self.valid = True
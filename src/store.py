@@ -0,0 +1,314 @@
+'''
+SQLite results store for several seasons.
+Grands prix and results of parsed championships are stored in a local database,
+the rankings used by the pages are computed with SQL queries. A selection of seasons
+provides the same methods as a Championship, so the pages can be rendered from it
+without loading all results into Python objects.
+'''
+
+import sqlite3
+from typing import Callable
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from src.championship import Championship, GrandPrix
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS season (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    date TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS driver (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS car (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS grand_prix (
+    id INTEGER PRIMARY KEY,
+    season_id INTEGER NOT NULL REFERENCES season(id) ON DELETE CASCADE,
+    number INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (season_id, number)
+);
+CREATE TABLE IF NOT EXISTS race_result (
+    id INTEGER PRIMARY KEY,
+    grand_prix_id INTEGER NOT NULL REFERENCES grand_prix(id) ON DELETE CASCADE,
+    driver_id INTEGER NOT NULL REFERENCES driver(id),
+    car_id INTEGER NOT NULL REFERENCES car(id),
+    position INTEGER NOT NULL,
+    laps INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    best_lap_time INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS race_result_driver ON race_result (driver_id, laps DESC, time);
+CREATE INDEX IF NOT EXISTS race_result_driver_lap ON race_result (driver_id, best_lap_time);
+CREATE INDEX IF NOT EXISTS race_result_car ON race_result (car_id);
+CREATE INDEX IF NOT EXISTS race_result_grand_prix ON race_result (grand_prix_id, laps DESC, time);
+'''
+
+# One row per driver with the totals, the best grand prix and the result with the fastest lap.
+# `seq` orders the results by season, grand prix and position in the file. On ties the
+# earliest result is used, like in the Driver class. The best and the fastest result of a
+# driver are looked up with the indexes on the driver.
+_DRIVER_QUERY = '''
+WITH selected AS (
+    SELECT gp.id, gp.number,
+           ROW_NUMBER() OVER (ORDER BY season.date, season.id, gp.number) << 32 AS seq
+    FROM grand_prix gp JOIN season ON season.id = gp.season_id
+    WHERE gp.season_id IN ({seasons})
+), totals AS (
+    SELECT rr.driver_id, SUM(rr.laps) AS total_laps, SUM(rr.time) AS total_time,
+           COUNT(*) AS races, MIN(g.seq + rr.id) AS first_seq
+    FROM race_result rr JOIN selected g ON g.id = rr.grand_prix_id
+    GROUP BY rr.driver_id
+)
+SELECT driver.name, t.total_laps, t.total_time, t.races,
+       b.position, driver.name, b.laps, b.time, best_car.name, b.best_lap_time, bg.number,
+       f.position, driver.name, f.laps, f.time, fastest_car.name, f.best_lap_time, fg.number
+FROM totals t
+JOIN driver ON driver.id = t.driver_id
+JOIN race_result b ON b.id = (
+    SELECT rr.id FROM race_result rr JOIN selected g ON g.id = rr.grand_prix_id
+    WHERE rr.driver_id = t.driver_id
+    ORDER BY rr.laps DESC, rr.time, g.seq + rr.id LIMIT 1)
+JOIN race_result f ON f.id = (
+    SELECT rr.id FROM race_result rr JOIN selected g ON g.id = rr.grand_prix_id
+    WHERE rr.driver_id = t.driver_id
+    ORDER BY rr.best_lap_time, g.seq + rr.id LIMIT 1)
+JOIN grand_prix bg ON bg.id = b.grand_prix_id
+JOIN grand_prix fg ON fg.id = f.grand_prix_id
+JOIN car best_car ON best_car.id = b.car_id
+JOIN car fastest_car ON fastest_car.id = f.car_id
+ORDER BY {order}
+'''
+
+_DRIVER_ORDERS = {
+    "first": "t.first_seq",
+    "best": "b.laps DESC, b.time, t.first_seq",
+    "total": "t.total_laps DESC, t.total_time, t.first_seq",
+    "fastest": "f.best_lap_time, t.first_seq",
+}
+
+_RESULT_QUERY = '''
+SELECT rr.position, driver.name, rr.laps, rr.time, car.name, rr.best_lap_time, gp.number
+FROM race_result rr
+JOIN grand_prix gp ON gp.id = rr.grand_prix_id
+JOIN driver ON driver.id = rr.driver_id
+JOIN car ON car.id = rr.car_id
+WHERE rr.grand_prix_id = ?
+ORDER BY rr.laps DESC, rr.time, rr.id
+'''
+
+
+class StoredResult(NamedTuple):
+    '''A race result read from the store, with the attributes of a RaceResult.'''
+    position: int
+    driver: str
+    laps: int
+    time: int
+    car: str
+    best_lap_time: int
+    race_id: int
+
+
+class StoredDriver(NamedTuple):
+    '''A driver read from the store, with the values used by the pages.'''
+    name: str
+    total_laps: int
+    total_time: int
+    number_of_grands_prix: int
+    best_grand_prix: StoredResult
+    fastest_lap_race_result: StoredResult
+
+    @property
+    def fastest_lap(self) -> int:
+        '''returns the time of the fastest lap of the driver'''
+        return self.fastest_lap_race_result.best_lap_time
+
+
+class ResultsStore:
+    '''
+    Stores the results of several seasons in a SQLite database.
+    Every season is stored under its own name, storing a season again replaces it.
+    '''
+
+    def __init__(self, path:str = ":memory:"):
+        '''
+        Opens the database and creates the tables and indexes if they are missing.
+
+        Parameters
+        ------------
+        path: str, default ":memory:"
+            The database file.
+        '''
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(_SCHEMA)
+        self._ids = {"driver": {}, "car": {}}
+
+    def close(self) -> None:
+        '''Closes the database.'''
+        self.connection.close()
+
+    def _name_id(self, table:str, name:str) -> int:
+        '''Returns the id of a driver or car name, it is inserted if it is unknown.'''
+        ids = self._ids[table]
+        if name not in ids:
+            self.connection.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (name,))
+            ids[name] = self.connection.execute(f"SELECT id FROM {table} WHERE name = ?",
+                                                (name,)).fetchone()[0]
+        return ids[name]
+
+    def add_championship(self, championship:Championship, season:str = None) -> None:
+        '''
+        Stores all grands prix of a championship as one season.
+
+        Parameters
+        ------------
+        championship: Championship
+            The championship to be stored.
+        season: str, default None
+            The name of the season, default is the name of the championship.
+            An existing season with this name is replaced.
+        '''
+        season = season or championship.name
+        with self.connection:
+            self.connection.execute("DELETE FROM season WHERE name = ?", (season,))
+            season_id = self.connection.execute(
+                "INSERT INTO season (name, date) VALUES (?, ?)",
+                (season, championship.date.isoformat())).lastrowid
+            for grand_prix in championship.grand_prix:
+                self._insert_grand_prix(season_id, grand_prix)
+
+    def add_grand_prix(self, season:str, grand_prix:GrandPrix) -> None:
+        '''
+        Stores a grand prix of an existing season, a grand prix with the same id is replaced.
+
+        Parameters
+        ------------
+        season: str
+            The name of the season.
+        grand_prix: GrandPrix
+            The GrandPrix to be stored.
+        '''
+        row = self.connection.execute("SELECT id FROM season WHERE name = ?",
+                                      (season,)).fetchone()
+        if row is None:
+            raise ValueError(f"Unknown season {season}")
+        with self.connection:
+            self.connection.execute("DELETE FROM grand_prix WHERE season_id = ? AND number = ?",
+                                    (row[0], grand_prix.id))
+            self._insert_grand_prix(row[0], grand_prix)
+
+    def _insert_grand_prix(self, season_id:int, grand_prix:GrandPrix) -> None:
+        '''Inserts a grand prix and its results.'''
+        grand_prix_id = self.connection.execute(
+            "INSERT INTO grand_prix (season_id, number, name) VALUES (?, ?, ?)",
+            (season_id, grand_prix.id, grand_prix.name)).lastrowid
+        self.connection.executemany(
+            "INSERT INTO race_result (grand_prix_id, driver_id, car_id, position, laps, time, "
+            "best_lap_time) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(grand_prix_id, self._name_id("driver", r.driver), self._name_id("car", r.car),
+              r.position, r.laps, r.time, r.best_lap_time) for r in grand_prix.results])
+
+    def seasons(self) -> List[str]:
+        '''Returns the names of all seasons in the order they were stored.'''
+        return [name for (name,) in self.connection.execute(
+            "SELECT name FROM season ORDER BY date, id")]
+
+    def results(self, seasons:Iterable[str] = None, name:str = None) -> 'StoredResults':
+        '''
+        Returns the results of some or all seasons.
+
+        Parameters
+        ------------
+        seasons: Iterable[str], default None
+            The names of the seasons, default are all seasons.
+        name: str, default None
+            The name shown on the pages, default are the names of the seasons.
+
+        Returns
+        ------------
+        StoredResults
+            The results of the seasons, they can be rendered like a championship.
+        '''
+        rows = self.connection.execute("SELECT id, name FROM season ORDER BY date, id").fetchall()
+        if seasons is not None:
+            selected = set(seasons)
+            unknown = selected.difference(season for _, season in rows)
+            if unknown:
+                raise ValueError(f"Unknown season {', '.join(sorted(unknown))}")
+            rows = [row for row in rows if row[1] in selected]
+        return StoredResults(self, [season_id for season_id, _ in rows],
+                             name or ", ".join(season for _, season in rows))
+
+
+class StoredResults:
+    '''
+    The results of a selection of seasons in a ResultsStore.
+    Provides the ranking methods of a Championship, the rankings are computed by SQL queries.
+    '''
+
+    def __init__(self, store:ResultsStore, season_ids:List[int], name:str):
+        self.store = store
+        self.season_ids = season_ids
+        self.name = name
+
+    def driver_standings(self, order:str = "best") -> List[StoredDriver]:
+        '''
+        Returns the drivers in ranking order.
+
+        Parameters
+        ------------
+        order: str, default "best"
+            "best" ranks by the best grand prix (laps, then time), "total" by total laps
+            and total time, "fastest" by the fastest lap, "first" by the first result.
+
+        Returns
+        ------------
+        list
+            List of StoredDriver objects in ranking order.
+        '''
+        if order not in _DRIVER_ORDERS:
+            raise ValueError(f"Unknown order {order}")
+        query = _DRIVER_QUERY.format(seasons=", ".join("?" * len(self.season_ids)),
+                                     order=_DRIVER_ORDERS[order])
+        return [StoredDriver(*row[:4], StoredResult(*row[4:11]), StoredResult(*row[11:]))
+                for row in self.store.connection.execute(query, self.season_ids)]
+
+    @property
+    def drivers(self) -> List[StoredDriver]:
+        '''Returns all drivers in the order of their first result.'''
+        return self.driver_standings("first")
+
+    def get_driver_result(self, sorted_key:Callable[[StoredDriver], tuple] = None
+                          ) -> List[StoredDriver]:
+        '''
+        Returns the drivers ranked by their best grand prix, like Championship.get_driver_result.
+        A custom sort key sorts the drivers in Python.
+        '''
+        if sorted_key is None:
+            return self.driver_standings("best")
+        return sorted(self.drivers, key=sorted_key)
+
+    def get_race_result(self) -> List[StoredResult]:
+        '''Returns the best result of every driver sorted by laps and time.'''
+        return [d.best_grand_prix for d in self.driver_standings("best")]
+
+    def get_driver_result_last_grand_prix(self) -> List[StoredResult]:
+        '''Returns the results of the last grand prix of the latest season, sorted by laps.'''
+        if not self.season_ids:
+            return []
+        row = self.store.connection.execute(
+            "SELECT gp.id FROM grand_prix gp JOIN season ON season.id = gp.season_id "
+            f"WHERE gp.season_id IN ({', '.join('?' * len(self.season_ids))}) "
+            "ORDER BY season.date DESC, season.id DESC, gp.number DESC LIMIT 1",
+            self.season_ids).fetchone()
+        if row is None:
+            return []
+        return [StoredResult(*result) for result in
+                self.store.connection.execute(_RESULT_QUERY, row)]
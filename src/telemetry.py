@@ -0,0 +1,310 @@
+'''
+Live lap timing from a stream of lap crossing events.
+The events are read from a pipe, a UDP socket or a replay file, one event per line:
+
+    start <timestamp>      start of the heat
+    <lane> <timestamp>     a car of the lane crossed the line
+    end                    end of the heat
+
+Timestamps are milliseconds. Every lane keeps the times of its last crossings in a
+fixed-size ring buffer, positions, gaps and fastest laps are updated on each crossing
+without allocating memory. When the heat ends, the lanes become RaceResults of a new
+grand prix of the championship.
+'''
+
+import time
+import socket
+from array import array
+from typing import BinaryIO
+from typing import Iterator
+from typing import List
+from typing import Sequence
+from typing import Tuple
+from src.championship import Championship, GrandPrix
+from src.race import RaceResult
+
+class LaneTiming: # pylint: disable=too-many-instance-attributes
+    '''
+    Timing of the car on one lane.
+    `gap` and `interval` are the time in milliseconds behind the leader and behind the
+    car in front, measured when this car crossed the line. They are -1 if the other car
+    is so many laps ahead that its crossing is no longer in the ring buffer.
+    '''
+    __slots__ = ("lane", "driver", "car", "laps", "last_crossing", "best_lap",
+                 "position", "gap", "interval", "_crossings")
+
+    def __init__(self, lane:int, driver:str, car:str, capacity:int):
+        self.lane = lane
+        self.driver = driver
+        self.car = car
+        self.laps = 0
+        self.last_crossing = 0
+        self.best_lap = 0
+        self.position = lane
+        self.gap = 0
+        self.interval = 0
+        self._crossings = array("q", bytes(8 * capacity))
+
+    def reset(self, start_time:int) -> None:
+        '''Clears the timing at the start of a heat.'''
+        self.laps = 0
+        self.last_crossing = start_time
+        self.best_lap = 0
+        self.gap = 0
+        self.interval = 0
+        self._crossings[0] = start_time
+
+    def record(self, timestamp:int) -> int:
+        '''Stores a crossing and returns the lap time.'''
+        lap_time = timestamp - self.last_crossing
+        self.laps += 1
+        self._crossings[self.laps % len(self._crossings)] = timestamp
+        self.last_crossing = timestamp
+        if not self.best_lap or lap_time < self.best_lap:
+            self.best_lap = lap_time
+        return lap_time
+
+    def crossing_time(self, lap:int) -> int:
+        '''Returns the time the car completed a lap, or -1 if it is no longer buffered.'''
+        if lap > self.laps or self.laps - lap >= len(self._crossings):
+            return -1
+        return self._crossings[lap % len(self._crossings)]
+
+    def lap_times(self) -> List[int]:
+        '''Returns the buffered lap times, the oldest first, one less than the capacity.'''
+        first = max(1, self.laps - len(self._crossings) + 2)
+        return [self.crossing_time(lap) - self.crossing_time(lap - 1)
+                for lap in range(first, self.laps + 1)]
+
+
+class HeatTelemetry:
+    '''
+    Positions, gaps and fastest laps of a running heat.
+    The ranking is kept as an array of lane indices. A crossing can only move its lane
+    forward, so it is swapped with the lanes it has overtaken.
+    '''
+
+    def __init__(self, lanes:Sequence[Tuple[str, str]], capacity:int = 64):
+        '''
+        Initializes the heat.
+
+        Parameters
+        ------------
+        lanes: Sequence[Tuple[str, str]]
+            Driver and car of each lane, lanes are numbered from 1.
+        capacity: int, default 64
+            Number of crossings kept per lane.
+        '''
+        if not lanes:
+            raise ValueError("A heat needs at least one lane")
+        if capacity < 2:
+            raise ValueError("The capacity must be at least 2")
+        self.lanes = [LaneTiming(lane, driver, car, capacity)
+                      for lane, (driver, car) in enumerate(lanes, 1)]
+        self._order = array("b" if len(lanes) < 128 else "i", range(len(lanes)))
+        self.start_time = 0
+        self.fastest_lap = 0
+        self.fastest_lane = 0
+        self.running = False
+        self.events = 0
+
+    def start(self, timestamp:int) -> None:
+        '''Starts the heat, all lanes are reset.'''
+        for lane in self.lanes:
+            lane.reset(timestamp)
+        for index, lane in enumerate(self.lanes):
+            self._order[index] = index
+            lane.position = index + 1
+        self.start_time = timestamp
+        self.fastest_lap = 0
+        self.fastest_lane = 0
+        self.running = True
+
+    def crossing(self, lane:int, timestamp:int) -> None:
+        '''
+        Records a lap crossing and updates position, gap and fastest lap.
+        A crossing before the heat was started starts it, e.g. a stream without start event.
+
+        Parameters
+        ------------
+        lane: int
+            The lane number, starting at 1.
+        timestamp: int
+            The time of the crossing in milliseconds.
+        '''
+        if not 0 < lane <= len(self.lanes):
+            raise ValueError(f"Unknown lane {lane}")
+        if not self.running:
+            self.start(timestamp)
+            return
+        timing = self.lanes[lane - 1]
+        lap_time = timing.record(timestamp)
+        self.events += 1
+        if not self.fastest_lap or lap_time < self.fastest_lap:
+            self.fastest_lap = lap_time
+            self.fastest_lane = lane
+
+        order = self._order
+        lanes = self.lanes
+        position = timing.position - 1
+        while position and lanes[order[position - 1]].laps < timing.laps:
+            order[position] = order[position - 1]
+            lanes[order[position]].position = position + 1
+            position -= 1
+        order[position] = lane - 1
+        timing.position = position + 1
+
+        if position:
+            leader = lanes[order[0]].crossing_time(timing.laps)
+            front = lanes[order[position - 1]].crossing_time(timing.laps)
+            timing.gap = timestamp - leader if leader >= 0 else -1
+            timing.interval = timestamp - front if front >= 0 else -1
+        else:
+            timing.gap = timing.interval = 0
+
+    def feed_line(self, line:bytes) -> bool:
+        '''
+        Processes one line of the event stream.
+
+        Returns
+        ------------
+        bool
+            False if the line ends the heat, otherwise True.
+
+        Raises
+        ------------
+        ValueError
+            If the line is not a valid event.
+        '''
+        fields = line.split()
+        if not fields or fields[0].startswith(b"#"):
+            return True
+        if fields[0] == b"end":
+            self.running = False
+            return False
+        if len(fields) != 2:
+            raise ValueError(f"Invalid telemetry event {line!r}")
+        if fields[0] == b"start":
+            self.start(int(fields[1]))
+        else:
+            self.crossing(int(fields[0]), int(fields[1]))
+        return True
+
+    def standings(self) -> List[LaneTiming]:
+        '''Returns the lanes in the order of the current positions.'''
+        return [self.lanes[index] for index in self._order]
+
+    def results(self, race_id:int) -> List[RaceResult]:
+        '''
+        Returns the results of the heat, lanes without a completed lap are left out.
+
+        Parameters
+        ------------
+        race_id: int
+            The ID of the grand prix the results belong to.
+
+        Returns
+        ------------
+        list
+            List of RaceResult objects in the order of the positions.
+        '''
+        return [RaceResult.from_values(lane.position, lane.driver, lane.laps,
+                                       lane.last_crossing - self.start_time, lane.car,
+                                       lane.best_lap, race_id)
+                for lane in self.standings() if lane.laps]
+
+    def finish(self, championship:Championship) -> GrandPrix:
+        '''
+        Ends the heat and adds its results as a new grand prix to the championship.
+
+        Parameters
+        ------------
+        championship: Championship
+            The championship the grand prix is added to.
+
+        Returns
+        ------------
+        GrandPrix
+            The new grand prix holding the results of the heat.
+        '''
+        self.running = False
+        grand_prix = championship.create_grand_prix()
+        for race_result in self.results(grand_prix.id):
+            grand_prix.add_race_result(race_result)
+        championship.add_result(grand_prix)
+        return grand_prix
+
+
+def stream_lines(stream:BinaryIO) -> Iterator[bytes]:
+    '''Yields the lines of a pipe or file opened in binary mode, e.g. `sys.stdin.buffer`.'''
+    return iter(stream.readline, b"")
+
+def replay_lines(path:str, speed:float = None) -> Iterator[bytes]:
+    '''
+    Yields the lines of a recorded event file.
+
+    Parameters
+    ------------
+    path: str
+        The replay file.
+    speed: float, default None
+        Replays the events in real time multiplied by this factor, None replays
+        them as fast as possible.
+    '''
+    with open(path, "rb") as file:
+        origin = None
+        for line in file:
+            fields = line.split()
+            if speed and len(fields) == 2:
+                timestamp = int(fields[1]) / 1000
+                if origin is None:
+                    origin = time.monotonic() - timestamp / speed
+                delay = origin + timestamp / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield line
+
+def udp_lines(host:str, port:int, buffer_size:int = 2048) -> Iterator[bytes]:
+    '''
+    Yields the lines of the datagrams received on a UDP port, a datagram may hold
+    several lines. The receive buffer is allocated once.
+
+    Parameters
+    ------------
+    host: str
+        The address to listen on.
+    port: int
+        The UDP port.
+    buffer_size: int, default 2048
+        The maximum size of a datagram.
+    '''
+    buffer = bytearray(buffer_size)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind((host, port))
+        while True:
+            size = sock.recv_into(buffer)
+            yield from buffer[:size].splitlines()
+
+def run_heat(heat:HeatTelemetry, lines:Iterator[bytes], championship:Championship = None
+             ) -> GrandPrix:
+    '''
+    Feeds the events to the heat until the stream or the heat ends.
+
+    Parameters
+    ------------
+    heat: HeatTelemetry
+        The heat receiving the events.
+    lines: Iterator[bytes]
+        The event stream, see `stream_lines`, `replay_lines` and `udp_lines`.
+    championship: Championship, default None
+        If given, the results are added to it as a new grand prix.
+
+    Returns
+    ------------
+    GrandPrix
+        The grand prix of the heat, or None without a championship.
+    '''
+    for line in lines:
+        if not heat.feed_line(line):
+            break
+    return heat.finish(championship) if championship is not None else None
@@ -0,0 +1,227 @@
+'''
+Watchers detect changes of the results file.
+The inotify watcher is used on Linux, the polling watcher everywhere else.
+Both are wrapped by a debounced watcher, so a file written in several chunks
+is reported once, after the writes have finished.
+'''
+
+import os
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+from src.metrics import Metrics
+
+class FileWatcher:
+    '''Base class of all file watchers.'''
+
+    def __init__(self, file_path:str):
+        '''Initializes the watcher for the given file.'''
+        self.file_path = file_path
+
+    def wait(self, timeout:float = None) -> bool:
+        '''
+        Blocks until the file has changed.
+
+        Parameters
+        ------------
+        timeout: float, default None
+            Maximum time to wait in seconds. Waits forever if None.
+
+        Returns
+        ------------
+        bool
+            True if the file has changed, False if the timeout expired.
+        '''
+        raise NotImplementedError
+
+    def close(self) -> None:
+        '''Releases the resources of the watcher.'''
+
+
+class PollingWatcher(FileWatcher):
+    '''Watcher comparing the modification time of the file in a fixed interval.'''
+
+    def __init__(self, file_path:str, interval:float = 2):
+        '''Initializes the watcher with the polling interval in seconds.'''
+        super().__init__(file_path)
+        self.interval = interval
+        self._last_mtime = self._get_mtime()
+
+    def _get_mtime(self) -> float:
+        '''Returns the modification time of the file or None if it does not exist.'''
+        try:
+            return os.path.getmtime(self.file_path)
+        except FileNotFoundError:
+            return None
+
+    def file_has_changed(self) -> bool:
+        '''Check if the file modification time has changed.'''
+        current_mtime = self._get_mtime()
+        if current_mtime is None:
+            return False
+        changed = current_mtime != self._last_mtime
+        self._last_mtime = current_mtime
+        return changed
+
+    def wait(self, timeout:float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.file_has_changed():
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(self.interval, remaining))
+            else:
+                time.sleep(self.interval)
+
+
+class InotifyWatcher(FileWatcher):
+    '''
+    Watcher using Linux inotify, the process sleeps until the kernel reports a change.
+    The directory of the file is watched, so a file that is replaced or created
+    after the watcher was started is detected as well.
+    '''
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, file_path:str):
+        '''Initializes the watcher, raises OSError if inotify is not available.'''
+        super().__init__(file_path)
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not supported")
+
+        self._name = os.fsencode(os.path.basename(file_path))
+        self._fd = libc.inotify_init1(self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        directory = os.path.dirname(os.path.abspath(file_path))
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def _read_events(self) -> bool:
+        '''Reads all pending events and returns True if one concerns the file.'''
+        buffer = os.read(self._fd, 64 * 1024)
+        changed = False
+        offset = 0
+        while offset < len(buffer):
+            _, _, _, length = self._EVENT.unpack_from(buffer, offset)
+            offset += self._EVENT.size
+            name = buffer[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name == self._name:
+                changed = True
+        return changed
+
+    def wait(self, timeout:float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+            if self._read_events():
+                return True
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class DebouncedWatcher(FileWatcher):
+    '''
+    Coalesces a burst of changes into a single change.
+    After the first change the watcher waits until the file has been quiet for
+    `quiet_period` seconds and its size has not changed in that time. If the file is
+    written continuously, the change is reported after `max_delay` seconds at the latest.
+    '''
+
+    def __init__(self, watcher:FileWatcher, quiet_period:float = 0.25, max_delay:float = 5):
+        '''
+        Initializes the watcher.
+
+        Parameters
+        ------------
+        watcher: FileWatcher
+            The watcher reporting the single changes.
+        quiet_period: float, default 0.25
+            Time in seconds without changes after which a burst is finished.
+        max_delay: float, default 5
+            Maximum time in seconds a change is delayed.
+        '''
+        super().__init__(watcher.file_path)
+        self.watcher = watcher
+        self.quiet_period = quiet_period
+        self.max_delay = max_delay
+
+    def _state(self) -> tuple:
+        '''Returns the inode and size of the file, or None if it does not exist.'''
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size
+
+    def wait(self, timeout:float = None) -> bool:
+        if not self.watcher.wait(timeout):
+            return False
+        deadline = time.monotonic() + self.max_delay
+        changes = 1
+        state = self._state()
+        while time.monotonic() < deadline:
+            quiet = min(self.quiet_period, max(0.0, deadline - time.monotonic()))
+            if self.watcher.wait(quiet):
+                changes += 1
+                state = self._state()
+                continue
+            current = self._state()
+            if current == state:
+                break
+            state = current
+        Metrics.shared().increment("file_changes", changes)
+        Metrics.shared().increment("coalesced_changes", changes - 1)
+        return True
+
+    def close(self) -> None:
+        self.watcher.close()
+
+
+def create_watcher(file_path:str, quiet_period:float = 0.25) -> FileWatcher:
+    '''
+    Creates the best watcher available on this platform.
+
+    Parameters
+    ------------
+    file_path: str
+        The path to the file to be watched.
+    quiet_period: float, default 0.25
+        Time in seconds without changes after which a burst of writes is finished.
+
+    Returns
+    ------------
+    FileWatcher
+        A DebouncedWatcher wrapping an InotifyWatcher if inotify is available,
+        otherwise a PollingWatcher.
+    '''
+    try:
+        watcher = InotifyWatcher(file_path)
+    except (OSError, AttributeError):
+        watcher = PollingWatcher(file_path)
+    return DebouncedWatcher(watcher, quiet_period)